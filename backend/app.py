@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from routers import health, data, model, backtest
 from routers import frontend
 from routers import regime
+from services import intrabar, model_registry, warmstart
 from services.market_stream import start_stream
 from services.utils import API_ALLOW_ORIGINS
 from deps import verify_token
@@ -44,4 +45,14 @@ app.include_router(
 
 @app.on_event("startup")
 def _start_ws_stream():
+    # buffers do ultimo snapshot antes do stream: /api/signals ja sai quente
+    warmstart.restore()
     start_stream()
+    intrabar.start()
+    warmstart.start()
+    model_registry.start()
+
+
+@app.on_event("shutdown")
+def _save_snapshot():
+    warmstart.save()
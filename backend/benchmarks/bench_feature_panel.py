@@ -0,0 +1,59 @@
+"""
+Benchmark: scan de indicadores com add_indicators por simbolo (`ta`) vs painel
+(feature_panel, todos os simbolos numa passada).
+
+Uso (a partir de backend/): python benchmarks/bench_feature_panel.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.feature_panel import add_indicators_panel  # noqa: E402
+from services.features import add_indicators  # noqa: E402
+
+ROWS = 5_000
+
+
+def make_frame(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    opn = close + rng.normal(0, 0.2, n)
+    return pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=n, freq="1min"),
+        "open": opn,
+        "high": np.maximum(opn, close) + abs(rng.normal(0, 0.2, n)),
+        "low": np.minimum(opn, close) - abs(rng.normal(0, 0.2, n)),
+        "close": close,
+        "volume": abs(rng.normal(50, 10, n)),
+    })
+
+
+def main() -> None:
+    frames = {f"SYM{i}USDT": make_frame(ROWS, i) for i in range(300)}
+    # equivalencia com o caminho por simbolo
+    sample = dict(list(frames.items())[:5])
+    for symbol, df in add_indicators_panel(sample).items():
+        pd.testing.assert_frame_equal(add_indicators(sample[symbol], engine="numpy"), df, check_exact=True)
+
+    print(f"{'symbols':>8} {'ta loop ms':>11} {'panel ms':>9}")
+    for n in (10, 50, 300):
+        subset = dict(list(frames.items())[:n])
+        t_loop = float("nan")
+        if n <= 50:
+            t = time.perf_counter()
+            for df in subset.values():
+                add_indicators(df, engine="ta")
+            t_loop = time.perf_counter() - t
+        t = time.perf_counter()
+        add_indicators_panel(subset)
+        t_panel = time.perf_counter() - t
+        print(f"{n:>8} {t_loop * 1e3:>11.0f} {t_panel * 1e3:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
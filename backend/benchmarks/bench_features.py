@@ -0,0 +1,68 @@
+"""
+Benchmark: add_indicators pelo caminho `ta` vs caminho NumPy (feature_kernels).
+
+Confere antes que as duas saidas sao equivalentes (mesmas colunas, mesmo padrao
+de NaN, erro relativo <= 1e-9).
+
+Uso (a partir de backend/): python benchmarks/bench_features.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.features import add_indicators  # noqa: E402
+
+TOL = 1e-9
+
+
+def make_frame(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    opn = close + rng.normal(0, 0.2, n)
+    return pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=n, freq="1min"),
+        "open": opn,
+        "high": np.maximum(opn, close) + abs(rng.normal(0, 0.2, n)),
+        "low": np.minimum(opn, close) - abs(rng.normal(0, 0.2, n)),
+        "close": close,
+        "volume": abs(rng.normal(50, 10, n)),
+    })
+
+
+def check(ref: pd.DataFrame, fast: pd.DataFrame) -> None:
+    assert list(ref.columns) == list(fast.columns)
+    for col in ref.columns[6:]:
+        a, b = ref[col].to_numpy(dtype=np.float64), fast[col].to_numpy(dtype=np.float64)
+        assert np.array_equal(np.isnan(a), np.isnan(b)), col
+        ok = ~np.isnan(a)
+        err = np.abs(a[ok] - b[ok]) / np.maximum(1.0, np.abs(a[ok]))
+        assert not err.size or err.max() <= TOL, (col, err.max())
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main() -> None:
+    print(f"{'rows':>8} {'ta ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for n in (500, 5_000, 50_000):
+        df = make_frame(n)
+        check(add_indicators(df, engine="ta"), add_indicators(df, engine="numpy"))
+        repeat = 10 if n <= 5_000 else 3
+        t_ta = best_of(lambda: add_indicators(df, engine="ta"), repeat)
+        t_np = best_of(lambda: add_indicators(df, engine="numpy"), repeat)
+        print(f"{n:>8} {t_ta * 1e3:>10.2f} {t_np * 1e3:>10.2f} {t_ta / t_np:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
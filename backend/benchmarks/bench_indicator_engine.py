@@ -0,0 +1,116 @@
+"""
+Benchmark + consistencia: IndicatorEngine (incremental) vs add_indicators (lote).
+
+Falha (AssertionError) se alguma coluna diverge do lote em padrao de NaN ou
+em erro relativo acima de 1e-9, em series normais, com trechos parados
+(range zero) e curtas (sem ATR/ADX no lote).
+
+Com --symbol a checagem roda sobre o historico gravado no candle_store
+(dados reais, com lacunas, trechos parados e ranges extremos), em janelas de
+--window barras (engine semeado do zero em cada uma), sem o benchmark.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_indicator_engine.py
+    python benchmarks/bench_indicator_engine.py --symbol BTCUSDT --interval 1m --limit 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import candle_store  # noqa: E402
+from services.features import add_indicators  # noqa: E402
+from services.indicator_engine import IndicatorEngine, compare_with_batch  # noqa: E402
+
+TOL = 1e-9
+
+
+def make_frame(n: int, seed: int = 7, flat: bool = False) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    opn = close + rng.normal(0, 0.2, n)
+    high = np.maximum(opn, close) + abs(rng.normal(0, 0.2, n))
+    low = np.minimum(opn, close) - abs(rng.normal(0, 0.2, n))
+    if flat and n > 80:
+        # mercado parado: range zero e closes repetidos
+        opn[50:80] = high[50:80] = low[50:80] = close[50:80] = close[50]
+    return pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=n, freq="1min"),
+        "open": opn,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": abs(rng.normal(50, 10, n)),
+    })
+
+
+def check_consistency() -> None:
+    for n, flat in ((20, False), (30, False), (500, False), (500, True), (5_000, False)):
+        errs = compare_with_batch(make_frame(n, flat=flat))
+        bad = {k: v for k, v in errs.items() if not v <= TOL}
+        assert not bad, f"n={n} flat={flat}: {bad}"
+        print(f"ok n={n:>5} flat={flat!s:<5} colunas={len(errs):>2} max_err={max(errs.values()):.1e}")
+
+
+def check_history(symbol: str, interval: str, limit: int, window: int) -> None:
+    df = candle_store.read(symbol, interval, limit)
+    if df.empty:
+        raise SystemExit(f"sem historico gravado para {symbol} {interval} (ver services.backfill)")
+    open_ms = pd.DatetimeIndex(df["open_time"]).asi8 // 1_000_000
+    steps = np.diff(open_ms)
+    step = int(np.median(steps)) if len(steps) else 0
+    flat = int((df["high"] == df["low"]).sum())
+    print(f"{symbol} {interval}: {len(df)} barras, lacunas={int((steps > step).sum())}, paradas={flat}")
+    failed = []
+    for lo in range(0, len(df), window):
+        part = df.iloc[lo:lo + window].reset_index(drop=True)
+        errs = compare_with_batch(part)
+        bad = {k: v for k, v in errs.items() if not v <= TOL}
+        label = f"{part['open_time'].iloc[0]} .. {part['open_time'].iloc[-1]}"
+        if bad:
+            failed.append(f"{label}: {bad}")
+        print(f"{'FALHA' if bad else 'ok':<5} {label} n={len(part):>5} max_err={max(errs.values(), default=0.0):.1e}")
+    assert not failed, "\n".join(failed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="IndicatorEngine vs add_indicators")
+    parser.add_argument("--symbol", help="checa o historico do candle_store em vez de series sinteticas")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--limit", type=int, default=20_000, help="ultimas N barras gravadas")
+    parser.add_argument("--window", type=int, default=5_000, help="barras por checagem")
+    args = parser.parse_args()
+    if args.symbol:
+        check_history(args.symbol.upper(), args.interval, args.limit, args.window)
+        return
+    check_consistency()
+    print(f"\n{'history':>8} {'batch ms':>10} {'update us':>10} {'peek us':>8}")
+    for n in (400, 2_000, 6_000):
+        df = make_frame(n)
+        t = time.perf_counter()
+        add_indicators(df)
+        t_batch = time.perf_counter() - t
+
+        eng = IndicatorEngine()
+        eng.seed(df.iloc[:-1])
+        last = df.iloc[-1]
+        bar = (int(last["open_time"].value // 10**6), last["open"], last["high"], last["low"], last["close"], last["volume"])
+        repeat = 200
+        t = time.perf_counter()
+        for _ in range(repeat):
+            eng.peek(*bar)
+        t_peek = (time.perf_counter() - t) / repeat
+        t = time.perf_counter()
+        for i in range(repeat):
+            eng.update(bar[0] + (i + 1) * 60_000, *bar[1:])
+        t_update = (time.perf_counter() - t) / repeat
+        print(f"{n:>8} {t_batch * 1e3:>10.2f} {t_update * 1e6:>10.1f} {t_peek * 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
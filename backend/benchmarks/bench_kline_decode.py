@@ -0,0 +1,78 @@
+"""
+Benchmark: decodificacao de klines (caminho antigo em pandas vs kline_decode).
+
+Uso (a partir de backend/): python benchmarks/bench_kline_decode.py
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import kline_decode  # noqa: E402
+
+BINANCE_COLS = [
+    "open_time", "open", "high", "low", "close", "volume",
+    "close_time", "qav", "trades", "taker_base", "taker_quote", "ignore",
+]
+
+
+def make_payload(n: int, seed: int = 7) -> bytes:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    t0 = 1_700_000_000_000
+    rows = []
+    for i in range(n):
+        c = close[i]
+        o = c + rng.normal(0, 0.2)
+        h = max(o, c) + abs(rng.normal(0, 0.2))
+        lo = min(o, c) - abs(rng.normal(0, 0.2))
+        t = t0 + i * 60_000
+        rows.append([
+            t, f"{o:.8f}", f"{h:.8f}", f"{lo:.8f}", f"{c:.8f}", f"{abs(rng.normal(50, 10)):.8f}",
+            t + 59_999, "1234.5", 42, "10.0", "1000.0", "0",
+        ])
+    return json.dumps(rows, separators=(",", ":")).encode()
+
+
+def legacy_decode(content: bytes) -> pd.DataFrame:
+    # copia do caminho anterior: _binance_klines + normalizacao de get_klines
+    df = pd.DataFrame(json.loads(content), columns=BINANCE_COLS)
+    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
+    df = df[["open_time", "open", "high", "low", "close", "volume"]]
+    for col in ["open", "high", "low", "close", "volume"]:
+        df[col] = df[col].astype(float)
+    df = df.sort_values("open_time").reset_index(drop=True)
+    for col in ["open", "high", "low", "close", "volume"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def best_of(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main() -> None:
+    print(f"{'rows':>8} {'legacy ms':>10} {'decode ms':>10} {'speedup':>8}")
+    for n in (1_000, 10_000, 100_000):
+        payload = make_payload(n)
+        ref = legacy_decode(payload)
+        fast = kline_decode.decode_binance(payload)
+        pd.testing.assert_frame_equal(ref, fast, check_exact=False, rtol=1e-12)
+        repeat = 20 if n <= 10_000 else 5
+        t_old = best_of(legacy_decode, payload, repeat)
+        t_new = best_of(kline_decode.decode_binance, payload, repeat)
+        print(f"{n:>8} {t_old * 1e3:>10.2f} {t_new * 1e3:>10.2f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: probabilidade de uma linha (e de um lote) pelo sklearn vs arrays
+exportados (model_export), com um payload treinado em candles sinteticos.
+
+Uso (a partir de backend/): python benchmarks/bench_model_inference.py
+"""
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import model_registry, models  # noqa: E402
+from services.features import add_indicators  # noqa: E402
+
+ROWS = 5_000
+
+
+def make_frame(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    opn = close + rng.normal(0, 0.2, n)
+    return pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=n, freq="1min"),
+        "open": opn,
+        "high": np.maximum(opn, close) + abs(rng.normal(0, 0.2, n)),
+        "low": np.minimum(opn, close) - abs(rng.normal(0, 0.2, n)),
+        "close": close,
+        "volume": abs(rng.normal(50, 10, n)),
+    })
+
+
+def timed(fn, repeat: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main() -> None:
+    warnings.filterwarnings("ignore")
+    model_registry.REGISTRY_DIR = tempfile.mkdtemp()
+    model_registry.LEGACY_PATH = ""
+    df = add_indicators(make_frame(ROWS, 0))
+    models.train_baseline(df)
+    payload = models._load_payload()
+    compiled = payload.get("compiled")
+    print(f"exportado: {compiled is not None}, erro maximo vs sklearn: {compiled and compiled['max_abs_err']:.2e}")
+
+    X, _, feats = models.build_training_frame(df)
+    row = dict(zip(feats, X[-1]))
+    results = {}
+    for mode in ("sklearn", "numpy"):
+        models.MODEL_INFERENCE = mode
+        results[mode] = models.predict_batch(X)["blend"]
+        t_row = timed(lambda: models.predict_proba_both(row), 2_000 if mode == "numpy" else 200)
+        t_batch = timed(lambda: models.predict_batch(X), 20)
+        print(f"{mode:>8}: 1 linha {t_row * 1e6:8.1f} us | lote {len(X)} linhas {t_batch * 1e3:7.2f} ms")
+    print(f"diferenca maxima no blend: {np.nanmax(np.abs(results['numpy'] - results['sklearn'])):.2e}")
+
+
+if __name__ == "__main__":
+    main()
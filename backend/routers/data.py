@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Query, Depends
-from services.collector import get_klines
+from fastapi.concurrency import run_in_threadpool
+from services.collector import get_klines_async
 from services.features import add_indicators, generate_short_signals
 from services.utils import DEFAULT_SYMBOL, DEFAULT_INTERVAL, CANDLES_LIMIT
 from deps import verify_token
@@ -7,28 +8,39 @@ from deps import verify_token
 router = APIRouter(dependencies=[Depends(verify_token)])
 
 
+def _records(df):
+    return df.assign(open_time=df["open_time"].astype(str)).to_dict(orient="records")
+
+
+def _signal_records(df):
+    df = add_indicators(df)
+    df = generate_short_signals(df)
+    return df.tail(10).to_dict(orient="records")
+
+
+# rotas async: os candles sao aguardados no loop do coletor sem prender uma
+# thread; o trabalho de CPU (indicadores, serializacao) vai para o threadpool
+
+
 @router.get("/candles")
-def candles(
+async def candles(
     symbol: str = DEFAULT_SYMBOL,
     interval: str = DEFAULT_INTERVAL,
     limit: int = CANDLES_LIMIT,
 ):
-    df = get_klines(symbol, interval, limit)
+    df = await get_klines_async(symbol, interval, limit)
     if df is None or df.empty:
         return []
-    df["open_time"] = df["open_time"].astype(str)
-    return df.to_dict(orient="records")
+    return await run_in_threadpool(_records, df)
 
 
 @router.get("/signals")
-def signals(
+async def signals(
     symbol: str = DEFAULT_SYMBOL,
     interval: str = DEFAULT_INTERVAL,
     limit: int = CANDLES_LIMIT,
 ):
-    df = get_klines(symbol, interval, limit)
+    df = await get_klines_async(symbol, interval, limit)
     if df is None or df.empty:
         return []
-    df = add_indicators(df)
-    df = generate_short_signals(df)
-    return df.tail(10).to_dict(orient="records")
+    return await run_in_threadpool(_signal_records, df)
@@ -1,17 +1,27 @@
 import math
 import os
+import queue
+import threading
 import time
 from typing import Dict, List
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
+from services import intrabar
+from services.events import bus, encode_sse
+from services.feature_matrix import FeatureMatrix, record_bytes
+from services.feature_panel import add_indicators_panel, chunks
 from services.features import add_indicators
 from services.local_regime import classify_regime
-from services.market_data import get_multi_timeframe, get_quality
+from services.market_data import get_multi_timeframe, get_quality, prefetch_ohlcv, prefetch_ohlcv_async
+from services.market_stream import add_listener
 from services.metrics import snapshot, snapshot_by_regime, update_metrics
-from services.online_model import get_model
+from services.online_model import find_model, get_model
 from services.openai_audit import audit_signal, explain_signal
 from services.strategies import combine_strategies
+from services.utils import FEATURES_ENGINE, FEATURES_MEMORY_PROFILE, FEATURES_PANEL_CHUNK
 
 router = APIRouter()
 
@@ -32,6 +42,19 @@ _CACHED_SIGNALS: List[Dict] = []
 _LAST_UPDATE = ""
 _LAST_FETCH = 0.0
 _LAST_SIGNAL_AT: Dict[str, float] = {}
+# cooldown, modelo online e metricas: so alterados por _build_signal sob este lock
+_SIGNAL_LOCK = threading.RLock()
+
+# Push (SSE): candle 1m fechado -> recalcula o sinal do simbolo -> publica se mudou
+_SIGNAL_QUEUE: "queue.Queue[str]" = queue.Queue()
+_PUSHED_SIGNALS: Dict[str, Dict] = {}
+_PUSH_LOCK = threading.Lock()
+_PUSH_STARTED = False
+# campos que, se mudarem, geram push
+_PUSH_KEYS = ("signal", "score", "strong", "regime", "reasons", "entry_price")
+# fecha de varios simbolos chegam juntos na virada do minuto: agrupa num unico push
+_PUSH_BATCH_SEC = 0.25
+_SSE_PING_SEC = 15.0
 
 
 def _get_symbols() -> List[str]:
@@ -60,17 +83,73 @@ def _map_signal_name(raw: str) -> tuple[str, bool]:
     return "NEUTRO", False
 
 
-def _build_signal(symbol: str, interval: str, limit: int) -> Dict:
-    def safe_float(value):
-        if value is None:
-            return None
+def _with_indicators(data: Dict, compact: bool = False) -> Dict:
+    # vazio (sem candles) passa direto, como antes
+    out = {}
+    for tf, df in data.items():
+        if df is not None and not df.empty:
+            df = add_indicators(df)
+            if compact:
+                df = FeatureMatrix.from_frame(df)
+        out[tf] = df
+    return out
+
+
+def _indicator_data(symbols: List[str], skip_errors: bool = False) -> Dict[str, Dict]:
+    """
+    Frames 1m/5m/15m ja com indicadores de varios simbolos. Com
+    FEATURES_ENGINE=numpy cada timeframe vira um painel (uma passada para todos);
+    com FEATURES_MEMORY_PROFILE=compact os frames sao FeatureMatrix (float32).
+    """
+    compact = FEATURES_MEMORY_PROFILE == "compact"
+    raw = {}
+    for symbol in symbols:
         try:
-            num = float(value)
-        except (TypeError, ValueError):
-            return None
-        return num if math.isfinite(num) else None
-
-    data = get_multi_timeframe(symbol, limit_1m=5000)
+            raw[symbol] = get_multi_timeframe(symbol, limit_1m=5000)
+        except Exception:
+            if not skip_errors:
+                raise
+    if FEATURES_ENGINE != "numpy":
+        out = {symbol: _with_indicators(data, compact) for symbol, data in raw.items()}
+    else:
+        out = {symbol: {} for symbol in raw}
+        for tf in ("1m", "5m", "15m"):
+            frames = add_indicators_panel({symbol: data.get(tf) for symbol, data in raw.items()}, compact)
+            for symbol, df in frames.items():
+                out[symbol][tf] = df
+    for symbol, frames in out.items():
+        record_bytes(symbol, frames)
+    return out
+
+
+def _safe_float(value):
+    if value is None:
+        return None
+    try:
+        num = float(value)
+    except (TypeError, ValueError):
+        return None
+    return num if math.isfinite(num) else None
+
+
+def _frames(data: Dict) -> Dict:
+    """Frames de _indicator_data prontos para _evaluate (copia o 1m com fwd_ret_5)."""
+    # perfil compacto: DataFrame sobre a matriz float32, so durante o calculo
+    data = {tf: df.to_frame() if isinstance(df, FeatureMatrix) else df for tf, df in data.items()}
+    df_1m = data.get("1m")
+    if df_1m is not None and not df_1m.empty:
+        data["1m"] = df_1m.assign(fwd_ret_5=df_1m["close"].pct_change(5).shift(-5))
+    return data
+
+
+def _evaluate(symbol: str, data: Dict) -> tuple[Dict, Dict | None]:
+    """
+    Sinal do simbolo a partir de _frames(...), sem efeito colateral alem de
+    publicar o regime para o intrabar: le o modelo online e o cooldown (sob
+    _SIGNAL_LOCK) mas nao treina, nao marca cooldown e nao conta metricas.
+    Retorna (sinal, resultado para _build_signal registrar); resultado None sem
+    candles. O push usa so isto.
+    """
     df_1m = data.get("1m")
     if df_1m is None or df_1m.empty:
         ts = int(time.time() * 1000)
@@ -92,12 +171,10 @@ def _build_signal(symbol: str, interval: str, limit: int) -> Dict:
             "reasons": ["Sem candles"],
             "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
             "strong": False,
-        }
+        }, None
 
-    df_1m = add_indicators(df_1m)
-    df_5m = add_indicators(data.get("5m")) if data.get("5m") is not None else None
-    df_15m = add_indicators(data.get("15m")) if data.get("15m") is not None else None
-    df_1m["fwd_ret_5"] = df_1m["close"].pct_change(5).shift(-5)
+    df_5m = data.get("5m")
+    df_15m = data.get("15m")
 
     df_1m = df_1m.dropna(subset=["close"])
     last = df_1m.iloc[-1].to_dict()
@@ -107,15 +184,17 @@ def _build_signal(symbol: str, interval: str, limit: int) -> Dict:
 
     regime_info = classify_regime(df_15m) if df_15m is not None else {"regime": "CHOP"}
     regime = regime_info.get("regime", "CHOP")
+    intrabar.set_regime(symbol, regime)
 
     strat = combine_strategies(last, regime)
     rule_long = int(strat.get("rule_long", 0))
     rule_short = int(strat.get("rule_short", 0))
     strategy = str(strat.get("strategy", "NONE"))
 
-    model = get_model(symbol)
-    model.update(df_1m.tail(5000))
-    prob_up = model.predict(last)
+    with _SIGNAL_LOCK:
+        model = find_model(symbol)
+        prob_up = model.predict(last) if model is not None else None
+        last_signal = _LAST_SIGNAL_AT.get(symbol, 0)
     if prob_up is None:
         prob_up = 0.5
     prob_down = 1.0 - prob_up
@@ -155,18 +234,14 @@ def _build_signal(symbol: str, interval: str, limit: int) -> Dict:
     # Cooldown
     now = time.time()
     cooldown_sec = 25 * 60
-    last_signal = _LAST_SIGNAL_AT.get(symbol, 0)
     cooldown_min = max(0, int((cooldown_sec - (now - last_signal)) / 60))
     if last_signal and (now - last_signal) < cooldown_sec and signal != "NEUTRO":
         reasons.append("Cooldown ativo")
         signal = "NEUTRO"
         strong = False
 
-    if signal != "NEUTRO":
-        _LAST_SIGNAL_AT[symbol] = now
-
-    entry = safe_float(last.get("close"))
-    atr = safe_float(last.get("atr14"))
+    entry = _safe_float(last.get("close"))
+    atr = _safe_float(last.get("atr14"))
     if entry is None:
         stop = None
         target = None
@@ -194,7 +269,7 @@ def _build_signal(symbol: str, interval: str, limit: int) -> Dict:
     if quality_1m.get("dups", 0) > 0:
         penalties += 5
         reasons.append("Duplicatas detectadas")
-    atr_ratio = safe_float(last.get("atr_ratio"))
+    atr_ratio = _safe_float(last.get("atr_ratio"))
     if atr_ratio is not None and atr_ratio > 0.02:
         penalties += 10
         reasons.append("ATR% extremo")
@@ -208,22 +283,21 @@ def _build_signal(symbol: str, interval: str, limit: int) -> Dict:
     base_score = max(prob_up, prob_down) * 100
     score = max(0, min(100, int(round(base_score - penalties))))
 
-    fwd_ret = safe_float(last.get("fwd_ret_5"))
-    update_metrics(symbol, regime, signal, fwd_ret)
+    outcome = {"signal": signal, "regime": regime, "fwd_ret": _safe_float(last.get("fwd_ret_5")), "at": now}
 
     mapped_signal, strong = _map_signal_name(signal)
 
-    return {
+    sig = {
         "id": _make_id(symbol, ts_ms),
         "symbol": symbol,
         "signal": mapped_signal,
         "score": score,
         "probability": prob_down if mapped_signal.startswith("SHORT") else prob_up,
         "regime": regime,
-        "rsi": safe_float(last.get("rsi14")),
-        "vol_z": safe_float(last.get("vol_z")),
-        "upper_wick": safe_float(last.get("upper_wick")),
-        "ret_15": safe_float(last.get("ret_15")),
+        "rsi": _safe_float(last.get("rsi14")),
+        "vol_z": _safe_float(last.get("vol_z")),
+        "upper_wick": _safe_float(last.get("upper_wick")),
+        "ret_15": _safe_float(last.get("ret_15")),
         "cooldown_min": cooldown_min,
         "entry_price": entry,
         "stop_loss": stop,
@@ -243,17 +317,46 @@ def _build_signal(symbol: str, interval: str, limit: int) -> Dict:
             },
         },
     }
+    return sig, outcome
+
+
+def _build_signal(symbol: str, interval: str, limit: int, data: Dict | None = None) -> Dict:
+    """
+    Caminho das rotas. `data`: frames de _indicator_data (com indicadores); se
+    None, busca e calcula. Treina o modelo online, avalia e registra cooldown e
+    metricas numa unica secao sob _SIGNAL_LOCK (rotas rodam em varias threads).
+    """
+    if data is None:
+        data = _with_indicators(get_multi_timeframe(symbol, limit_1m=5000))
+    data = _frames(data)
+    df_1m = data.get("1m")
+    with _SIGNAL_LOCK:
+        if df_1m is not None and not df_1m.empty:
+            get_model(symbol).update(df_1m.dropna(subset=["close"]).tail(5000))
+        sig, outcome = _evaluate(symbol, data)
+        if outcome is not None:
+            if outcome["signal"] != "NEUTRO":
+                _LAST_SIGNAL_AT[symbol] = outcome["at"]
+            update_metrics(symbol, outcome["regime"], outcome["signal"], outcome["fwd_ret"])
+    return sig
+
+
+def _cache_fresh(now: float) -> bool:
+    return bool(_CACHED_SIGNALS) and (now - _LAST_FETCH) < 10
 
 
 def _get_cached_signals(interval: str, limit: int) -> List[Dict]:
     global _CACHED_SIGNALS, _LAST_UPDATE, _LAST_FETCH
     now = time.time()
-    if _CACHED_SIGNALS and (now - _LAST_FETCH) < 10:
+    if _cache_fresh(now):
         return _CACHED_SIGNALS
 
+    symbols = _get_symbols()
+    prefetch_ohlcv(symbols, "1m", 5000)
     results = []
-    for symbol in _get_symbols():
-        results.append(_build_signal(symbol, interval, limit))
+    for chunk in chunks(symbols, FEATURES_PANEL_CHUNK):
+        for symbol, data in _indicator_data(chunk).items():
+            results.append(_build_signal(symbol, interval, limit, data))
 
     _CACHED_SIGNALS = sorted(results, key=lambda s: s.get("score", 0), reverse=True)
     _LAST_UPDATE = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
@@ -261,14 +364,100 @@ def _get_cached_signals(interval: str, limit: int) -> List[Dict]:
     return _CACHED_SIGNALS
 
 
+async def _cached_signals(interval: str, limit: int) -> List[Dict]:
+    # rotas async: candles aguardados no loop do coletor, o calculo no threadpool
+    if not _cache_fresh(time.time()):
+        await prefetch_ohlcv_async(_get_symbols(), "1m", 5000)
+    return await run_in_threadpool(_get_cached_signals, interval, limit)
+
+
+def _public(entry: Dict) -> Dict:
+    item = dict(entry)
+    item.pop("strong", None)
+    return item
+
+
+def _on_candle(symbol: str, closed: bool) -> None:
+    # roda na thread do WebSocket: so enfileira, e so se ha alguem ouvindo
+    if closed and bus.subscribers():
+        _SIGNAL_QUEUE.put(symbol.upper())
+
+
+def _push_worker() -> None:
+    while True:
+        pending = {_SIGNAL_QUEUE.get()}
+        time.sleep(_PUSH_BATCH_SEC)
+        while not _SIGNAL_QUEUE.empty():
+            pending.add(_SIGNAL_QUEUE.get_nowait())
+        changed = []
+        for chunk in chunks(sorted(pending & set(_get_symbols())), FEATURES_PANEL_CHUNK):
+            try:
+                batch = _indicator_data(chunk, skip_errors=True)
+            except Exception:
+                continue
+            for symbol, data in batch.items():
+                try:
+                    # so avalia: cooldown, modelo online e metricas sao do caminho das rotas
+                    sig, _ = _evaluate(symbol, _frames(data))
+                except Exception:
+                    continue
+                prev = _PUSHED_SIGNALS.get(symbol)
+                _PUSHED_SIGNALS[symbol] = sig
+                if prev is None or any(prev.get(k) != sig.get(k) for k in _PUSH_KEYS):
+                    changed.append(_public(sig))
+        if changed:
+            try:
+                bus.publish("signals", changed)
+            except Exception:
+                pass
+
+
+def _start_push() -> None:
+    global _PUSH_STARTED
+    with _PUSH_LOCK:
+        if _PUSH_STARTED:
+            return
+        add_listener(_on_candle)
+        threading.Thread(target=_push_worker, name="signals-push", daemon=True).start()
+        _PUSH_STARTED = True
+
+
+@router.get("/signals/stream")
+async def signals_stream(request: Request):
+    """
+    Server-Sent Events: "snapshot" com os sinais atuais ao conectar e depois
+    "signals" so com os sinais que mudaram quando um candle 1m fecha.
+    """
+    _start_push()
+    current = {s.get("symbol"): s for s in _CACHED_SIGNALS}
+    current.update(_PUSHED_SIGNALS)
+    snapshot = encode_sse("snapshot", [_public(s) for s in current.values()])
+    sub = bus.subscribe()
+
+    async def gen():
+        try:
+            yield snapshot
+            while not await request.is_disconnected():
+                msg = await sub.get(timeout=_SSE_PING_SEC)
+                yield msg if msg is not None else b": ping\n\n"
+        finally:
+            bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/signals")
-def list_signals(
+async def list_signals(
     minScore: int = Query(default=0),
     onlyStrong: bool = Query(default=False),
     interval: str = Query(default="1m"),
     limit: int = Query(default=500),
 ):
-    signals = _get_cached_signals(interval, limit)
+    signals = await _cached_signals(interval, limit)
     filtered = [
         s for s in signals
         if s.get("score", 0) >= minScore and (not onlyStrong or s.get("strong"))
@@ -282,21 +471,27 @@ def list_signals(
 
 
 @router.get("/signals/latest")
-def signals_latest(
+async def signals_latest(
     interval: str = Query(default="1m"),
     limit: int = Query(default=500),
 ):
-    _get_cached_signals(interval, limit)
+    await _cached_signals(interval, limit)
     return {"lastUpdate": _LAST_UPDATE}
 
 
+@router.get("/signals/intrabar")
+def signals_intrabar():
+    # regras sobre o candle 1m em formacao (STREAM_INTRABAR=1); vazio se desligado
+    return intrabar.latest()
+
+
 @router.get("/signals/{signal_id}")
-def get_signal(
+async def get_signal(
     signal_id: int,
     interval: str = Query(default="1m"),
     limit: int = Query(default=500),
 ):
-    signals = _get_cached_signals(interval, limit)
+    signals = await _cached_signals(interval, limit)
     for entry in signals:
         if entry.get("id") == signal_id:
             item = dict(entry)
@@ -306,11 +501,11 @@ def get_signal(
 
 
 @router.get("/alerts")
-def list_alerts(
+async def list_alerts(
     interval: str = Query(default="1m"),
     limit: int = Query(default=500),
 ):
-    signals = _get_cached_signals(interval, limit)
+    signals = await _cached_signals(interval, limit)
     alerts = []
     for entry in signals:
         if entry.get("strong"):
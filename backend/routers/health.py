@@ -1,4 +1,10 @@
 from fastapi import APIRouter
+from services import singleflight
+from services.events import bus
+from services.feature_matrix import memory_report
+from services.collector import cache_stats, exchange_stats
+from services.market_stream import stream_stats
+from services.utils import FEATURES_MEMORY_PROFILE
 
 router = APIRouter()
 
@@ -7,3 +13,38 @@ router = APIRouter()
 def ping():
     return {"ok": True}
 
+
+@router.get("/singleflight")
+def singleflight_stats():
+    # por chave: calls (execucoes reais), coalesced (chamadas que pegaram carona), waiters (esperando agora)
+    return singleflight.snapshot()
+
+
+@router.get("/exchanges")
+def exchanges():
+    # estado do circuit breaker e saldo do orcamento de peso por exchange
+    return exchange_stats()
+
+
+@router.get("/cache")
+def cache():
+    # cache de candles em memoria: entradas, linhas e bytes contra CANDLES_CACHE_MAX_MB
+    return cache_stats()
+
+
+@router.get("/stream")
+def stream():
+    # por conexao WebSocket: mensagens/s, lag do evento, reconexoes e candles recuperados via REST
+    return stream_stats()
+
+
+@router.get("/events")
+def events():
+    # assinantes do barramento (SSE), publicacoes e mensagens descartadas por cliente lento
+    return bus.stats()
+
+
+@router.get("/features")
+def features():
+    # bytes de features por simbolo/timeframe no ultimo scan (perfil full ou compact)
+    return memory_report(FEATURES_MEMORY_PROFILE)
@@ -1,22 +1,35 @@
+import numpy as np
+import pandas as pd
 from fastapi import APIRouter
-from services.collector import get_klines
-from services.features import add_indicators
-from services.models import train_baseline, predict_proba_down, predict_proba_both, get_threshold, get_model_info, get_weights
+from fastapi.concurrency import run_in_threadpool
+from services import model_registry
+from services.collector import get_klines_async, get_klines_many_async
+from services.features import add_indicators, rule_short_sniper_row
+from services.models import train_baseline, predict_batch, get_threshold, get_model_info
 from services.rules import fuse_model_and_rules, fuse_with_regime
+from services.strategies import short_sniper_mask
 from services.utils import DEFAULT_SYMBOL, DEFAULT_INTERVAL, CANDLES_LIMIT
 
 router = APIRouter()
 
 
+# rotas de candles sao async: a busca e aguardada no loop do coletor e o
+# trabalho de CPU (indicadores, treino, modelo) roda no threadpool
+
+
 @router.post("/train")
-def train(
+async def train(
     symbol: str = DEFAULT_SYMBOL,
     interval: str = DEFAULT_INTERVAL,
     limit: int = CANDLES_LIMIT,
 ):
-    df = get_klines(symbol, interval, limit)
+    df = await get_klines_async(symbol, interval, limit)
     if df is None or df.empty:
         return {"ok": False, "error": f"Sem candles para {symbol} {interval}."}
+    return await run_in_threadpool(_train, df)
+
+
+def _train(df: pd.DataFrame) -> dict:
     df = add_indicators(df)
     df2 = df.dropna()
     if len(df2) < 60:
@@ -38,66 +51,30 @@ def train(
         return {"ok": False, "error": str(e)}
 
 
-@router.post("/predict")
-def predict(
-    symbol: str = DEFAULT_SYMBOL,
-    interval: str = DEFAULT_INTERVAL,
-    limit: int = CANDLES_LIMIT,
-):
-    df = get_klines(symbol, interval, limit)
+def _empty_response(symbol: str, interval: str, df: pd.DataFrame | None, error: str) -> dict:
+    out = {"symbol": symbol, "interval": interval, "error": error}
+    if df is not None and not df.empty:
+        out["last_raw"] = df.tail(3).to_dict(orient="records")
+    out["fused"] = {"signal": "NEUTRAL", "confidence": 0.0}
+    return out
+
+
+def _last_row(symbol: str, interval: str, df: pd.DataFrame | None):
+    """(ultima linha com indicadores, None) ou (None, resposta de erro)."""
     if df is None or df.empty:
-        return {
-            "symbol": symbol,
-            "interval": interval,
-            "error": f"Sem candles para {symbol} {interval}.",
-            "fused": {"signal": "NEUTRAL", "confidence": 0.0},
-        }
+        return None, _empty_response(symbol, interval, None, f"Sem candles para {symbol} {interval}.")
     df = add_indicators(df)
     df2 = df.dropna()
     if df2.empty:
-        return {
-            "symbol": symbol,
-            "interval": interval,
-            "error": "Dados insuficientes apos indicadores (precisa de ~30+ candles).",
-            "last_raw": df.tail(3).to_dict(orient="records"),
-            "fused": {"signal": "NEUTRAL", "confidence": 0.0},
-        }
-    last = df2.iloc[-1].to_dict()
+        return None, _empty_response(
+            symbol, interval, df, "Dados insuficientes apos indicadores (precisa de ~30+ candles)."
+        )
+    return df2.iloc[-1].to_dict(), None
 
-    # regra de euforia
-    from services.features import rule_short_sniper_row
 
-    rule_flag = rule_short_sniper_row(last)
-
-    # prob de queda + regime (macro)
-    from services.regime import compute_regime_snapshot
-
-    snap = compute_regime_snapshot()
-
-    try:
-        probs = predict_proba_both(last)
-        wm, wn = get_weights()
-        p_model = probs.get("model") or 0.0
-        p_neural = probs.get("neural") if probs.get("neural") is not None else p_model
-        prob_down = wm * p_model + wn * p_neural
-        thr = get_threshold(0.55)
-        fused = fuse_model_and_rules(prob_down, rule_flag, thr)
-        fused2 = fuse_with_regime(fused, snap["regime"], symbol)
-        return {
-            "symbol": symbol,
-            "interval": interval,
-            "prob_down": prob_down,
-            "prob_model": p_model,
-            "prob_neural": p_neural,
-            "weights": {"model": wm, "neural": wn},
-            "threshold": thr,
-            "rule_short": rule_flag,
-            "fused": fused,
-            "fused_final": fused2,
-            "regime": snap,
-            "last": last,
-        }
-    except FileNotFoundError:
+def _fused_response(symbol: str, interval: str, last: dict, rule_flag: int, snap: dict, probs: dict | None, i: int = 0) -> dict:
+    # probs: saida de predict_batch (linha i); None = modelo nao treinado
+    if probs is None:
         thr = 0.55
         fused = {"signal": "NEUTRAL", "confidence": 0.0}
         fused2 = fuse_with_regime(fused, snap["regime"], symbol)
@@ -113,12 +90,129 @@ def predict(
             "last": last,
             "error": "Modelo nao encontrado. Treine primeiro em /model/train.",
         }
+    wm, wn = (float(w[i]) if np.ndim(w) else float(w) for w in probs["weights"])
+    version = probs["version"][i] if isinstance(probs["version"], list) else probs["version"]
+    p_model = float(probs["model"][i])
+    p_neural = float(probs["neural"][i]) if probs["neural"] is not None else p_model
+    prob_down = float(probs["blend"][i])
+    thr = get_threshold(0.55, symbol)
+    fused = fuse_model_and_rules(prob_down, rule_flag, thr)
+    fused2 = fuse_with_regime(fused, snap["regime"], symbol)
+    return {
+        "symbol": symbol,
+        "interval": interval,
+        "prob_down": prob_down,
+        "prob_model": p_model,
+        "prob_neural": p_neural,
+        "weights": {"model": wm, "neural": wn},
+        "model_version": version,
+        "threshold": thr,
+        "rule_short": rule_flag,
+        "fused": fused,
+        "fused_final": fused2,
+        "regime": snap,
+        "last": last,
+    }
+
+
+@router.post("/predict")
+async def predict(
+    symbol: str = DEFAULT_SYMBOL,
+    interval: str = DEFAULT_INTERVAL,
+    limit: int = CANDLES_LIMIT,
+):
+    df = await get_klines_async(symbol, interval, limit)
+    return await run_in_threadpool(_predict, symbol, interval, df)
+
+
+def _predict(symbol: str, interval: str, df: pd.DataFrame) -> dict:
+    last, error = _last_row(symbol, interval, df)
+    if error is not None:
+        return error
+
+    # regra de euforia
+    rule_flag = rule_short_sniper_row(last)
+
+    # prob de queda + regime (macro)
+    from services.regime import compute_regime_snapshot
+
+    snap = compute_regime_snapshot()
+
+    try:
+        probs = predict_batch(last, symbol)
+    except FileNotFoundError:
+        probs = None
+    return _fused_response(symbol, interval, last, rule_flag, snap, probs)
+
+
+@router.post("/predict/batch")
+async def predict_many(
+    symbols: str = DEFAULT_SYMBOL,
+    interval: str = DEFAULT_INTERVAL,
+    limit: int = CANDLES_LIMIT,
+):
+    """
+    /predict para varios simbolos (separados por virgula): candles num lote so,
+    e as ultimas linhas de todos pontuadas numa unica chamada do modelo.
+    Retorna a lista de respostas de /predict, na ordem pedida.
+    """
+    syms = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    frames = await get_klines_many_async(syms, interval, limit)
+    return await run_in_threadpool(_predict_many, syms, interval, frames)
+
+
+def _predict_many(syms: list, interval: str, frames: dict) -> list:
+    from services.regime import compute_regime_snapshot
+
+    snap = compute_regime_snapshot()
+
+    out, rows = {}, {}
+    for sym in syms:
+        last, error = _last_row(sym, interval, frames.get(sym))
+        if error is not None:
+            out[sym] = error
+        else:
+            rows[sym] = last
+    if rows:
+        batch = pd.DataFrame(list(rows.values()))
+        rule_flags = short_sniper_mask(batch).astype(int)
+        try:
+            probs = predict_batch(batch, list(rows))
+        except FileNotFoundError:
+            probs = None
+        for i, (sym, last) in enumerate(rows.items()):
+            out[sym] = _fused_response(sym, interval, last, int(rule_flags[i]), snap, probs, i)
+    return [out[sym] for sym in syms]
 
 
 @router.get("/meta")
-def meta():
+def meta(symbol: str | None = None):
     try:
-        info = get_model_info()
+        info = get_model_info(symbol)
         return {"ok": True, **info}
     except FileNotFoundError:
         return {"ok": False, "error": "Modelo nao encontrado. Treine em /model/train."}
+
+
+@router.get("/versions")
+def versions():
+    # versoes publicadas, CURRENT, pins por simbolo e versoes carregadas em memoria
+    return model_registry.status()
+
+
+@router.post("/rollback")
+def rollback(version: str | None = None):
+    """Ativa `version` ou, sem ela, a versao publicada antes da atual."""
+    try:
+        return {"ok": True, "current": model_registry.rollback(version)}
+    except (FileNotFoundError, ValueError) as e:
+        return {"ok": False, "error": str(e)}
+
+
+@router.post("/pin")
+def pin(symbol: str, version: str | None = None):
+    """Fixa a versao do modelo para o simbolo; sem `version` remove o pin."""
+    try:
+        return {"ok": True, "pins": model_registry.pin(symbol, version)}
+    except FileNotFoundError as e:
+        return {"ok": False, "error": str(e)}
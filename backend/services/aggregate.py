@@ -0,0 +1,103 @@
+"""
+Agregacao incremental de candles 1m fechados em intervalos maiores (5m, 15m...),
+com a mesma semantica de market_data._resample: bucket fechado a direita e
+rotulado pelo limite direito, i.e. o 1m com open_time t vai para o rotulo
+ceil(t / step) * step. O bucket corrente (parcial) e a ultima barra do buffer;
+um bucket inicial sem todos os seus 1m (historico comeca no meio dele) e
+descartado, nunca rotulado como barra cheia.
+"""
+import numpy as np
+import pandas as pd
+
+from .ringbuffer import CandleRing, to_frame
+
+
+_MINUTE_MS = 60_000
+
+
+def _labels(open_ms: np.ndarray, step: int) -> np.ndarray:
+    return -(-open_ms // step) * step
+
+
+def first_full_label(start_ms: int, step: int) -> int:
+    """Rotulo do primeiro bucket com todos os 1m a partir de start_ms."""
+    label = int(_labels(np.int64(start_ms), step))
+    # o bucket `label` cobre open_time em (label - step, label]
+    return label if start_ms == label - step + _MINUTE_MS else label + step
+
+
+def _reduce(t: np.ndarray, cols: np.ndarray, step: int):
+    """Agrega 1m ordenados por rotulo -> (labels, cols (5, m))."""
+    labels = _labels(t, step)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(t)] - 1
+    out = np.vstack([
+        cols[0][starts],
+        np.maximum.reduceat(cols[1], starts),
+        np.minimum.reduceat(cols[2], starts),
+        cols[3][ends],
+        np.add.reduceat(cols[4], starts),
+    ])
+    return labels[starts], out
+
+
+class BarAggregator:
+    """
+    Mantem as barras de `step_ms` de um buffer 1m (`source`). `add` custa O(1)
+    por 1m fechado; se um 1m ja agregado e regravado (mesmo open_time), o bucket
+    corrente e recalculado a partir do buffer 1m. Sem lock proprio (usa o do dono).
+    """
+
+    def __init__(self, source: CandleRing, step_ms: int) -> None:
+        self.source = source
+        self.step = int(step_ms)
+        self._bars = max(1, self.step // _MINUTE_MS)
+        self.ring = CandleRing(source.capacity // self._bars + 2)
+        self._last_src: int | None = None
+
+    def rebuild(self) -> None:
+        """Recalcula tudo a partir do buffer 1m (apos carga em bloco)."""
+        self.ring = CandleRing(self.ring.capacity)
+        t, cols = self.source.view(self.source.capacity)
+        self._last_src = int(t[-1]) if len(t) else None
+        if len(t):
+            keep = t > first_full_label(int(t[0]), self.step) - self.step
+            if keep.any():
+                self.ring.extend(*_reduce(t[keep], np.ascontiguousarray(cols[:, keep]), self.step))
+
+    def _recompute(self, label: int) -> None:
+        t, cols = self.source.view(self._bars)
+        keep = t > label - self.step
+        if keep.any():
+            labels, out = _reduce(t[keep], np.ascontiguousarray(cols[:, keep]), self.step)
+            self.ring.push(int(labels[-1]), *out[:, -1])
+
+    def add(self, open_ms: int, o: float, h: float, l: float, c: float, v: float) -> None:
+        label = int(_labels(np.int64(open_ms), self.step))
+        if self._last_src is not None and open_ms <= self._last_src:
+            if open_ms == self._last_src and self.ring.last_open_ms() == label:
+                self._recompute(label)
+            return
+        self._last_src = int(open_ms)
+        if self.ring.last_open_ms() is None and label < first_full_label(open_ms, self.step):
+            # comecou no meio do bucket: espera o proximo inteiro
+            return
+        if self.ring.last_open_ms() == label:
+            _, cur = self.ring.view(1)
+            o0, h0, l0, _, v0 = cur[:, 0]
+            self.ring.push(label, o0, max(h0, h), min(l0, l), c, v0 + v)
+        else:
+            self.ring.push(label, o, h, l, c, v)
+
+    def frame(self, start_ms: int, end_ms: int) -> pd.DataFrame | None:
+        """
+        Barras cujo bucket cobre 1m de open_time em [start_ms, end_ms], sem o
+        bucket inicial se start_ms cai no meio dele (como _resample); None se o
+        agregado nao cobre a janela inteira (o chamador cai no resample).
+        """
+        lo, hi = first_full_label(int(start_ms), self.step), int(_labels(np.int64(end_ms), self.step))
+        t, cols = self.ring.view(self.ring.capacity)
+        if len(t) == 0 or t[0] > lo or t[-1] < hi:
+            return None
+        i, j = np.searchsorted(t, lo, side="left"), np.searchsorted(t, hi, side="right")
+        return to_frame(t[i:j], cols[:, i:j])
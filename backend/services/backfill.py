@@ -0,0 +1,131 @@
+"""
+Backfill de historico: divide [start, end] em paginas, baixa em paralelo
+(dentro do orcamento de peso de cada exchange) e grava no candle_store.
+Paginas concluidas ficam em backfill.json; uma nova execucao retoma dali.
+
+Uso (a partir de backend/):
+    python -m services.backfill BTCUSDT,ETHUSDT --interval 1m --start 2024-01-01 --end 2024-03-01
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Iterable
+
+import pandas as pd
+
+from . import candle_store
+from .collector import PAGE_ROWS, fetch_page, interval_to_ms, page_ranges, run_async
+
+
+def _manifest_path(symbol: str, interval: str) -> str:
+    return os.path.join(candle_store.series_dir(symbol, interval), "backfill.json")
+
+
+def _load_done(symbol: str, interval: str) -> set:
+    try:
+        with open(_manifest_path(symbol, interval)) as fh:
+            data = json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return set()
+    # paginas de outro tamanho nao batem com o plano atual
+    if data.get("page_rows") != PAGE_ROWS:
+        return set()
+    return set(int(x) for x in data.get("done", []))
+
+
+def _save_done(symbol: str, interval: str, done: set) -> None:
+    path = _manifest_path(symbol, interval)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump({"page_rows": PAGE_ROWS, "done": sorted(done)}, fh)
+    os.replace(tmp, path)
+
+
+async def _backfill_symbol(symbol: str, interval: str, start_ms: int, end_ms: int) -> Dict[str, int]:
+    step = interval_to_ms(interval)
+    done = _load_done(symbol, interval)
+    pages = page_ranges(start_ms, end_ms, step)
+    todo = [(lo, hi) for lo, hi in pages if lo not in done]
+    # a pagina que ainda contem candles abertos nunca e marcada como concluida
+    closed_until = int(time.time() * 1000) - step
+
+    async def one(lo: int, hi: int) -> int:
+        df = await fetch_page(symbol, interval, lo, hi)
+        if not df.empty:
+            ms = df["open_time"].to_numpy(dtype="datetime64[ms]").astype("int64")
+            df = df[(ms >= lo) & (ms <= hi)]
+        rows = await asyncio.to_thread(candle_store.merge, symbol, interval, df, step)
+        if hi <= closed_until:
+            done.add(lo)
+            _save_done(symbol, interval, done)
+        return rows
+
+    results = await asyncio.gather(*[one(lo, hi) for lo, hi in todo], return_exceptions=True)
+    return {
+        "pages": len(pages),
+        "skipped": len(pages) - len(todo),
+        "failed": sum(1 for r in results if isinstance(r, BaseException)),
+        "rows": sum(r for r in results if not isinstance(r, BaseException)),
+    }
+
+
+async def _backfill(symbols: Iterable[str], interval: str, start_ms: int, end_ms: int) -> Dict[str, Dict[str, int]]:
+    uniq = list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+    results = await asyncio.gather(
+        *[_backfill_symbol(s, interval, start_ms, end_ms) for s in uniq]
+    )
+    return dict(zip(uniq, results))
+
+
+# epoch ms so a partir de 1973-03-03; digitos curtos sao datas compactas
+_MIN_EPOCH_MS = 10**11
+_DIGIT_DATES = {4: "%Y", 6: "%Y%m", 8: "%Y%m%d"}
+
+
+def _to_ms(value) -> int:
+    text = str(value).strip()
+    if isinstance(value, (int, float)) or text.isdigit():
+        if int(value) >= _MIN_EPOCH_MS:
+            return int(value)
+        if not text.isdigit() or len(text) not in _DIGIT_DATES:
+            raise ValueError(f"data ambigua: {value!r} (use ISO, YYYYMMDD ou epoch ms)")
+        # "2024", "202401", "20240101": ano / mes / data compacta
+        ts = pd.to_datetime(text, format=_DIGIT_DATES[len(text)])
+    else:
+        ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.value // 10**6)
+
+
+def backfill(symbols: Iterable[str], interval: str, start, end=None) -> Dict[str, Dict[str, int]]:
+    """
+    Baixa e grava no disco os candles de `symbols` entre start e end
+    (epoch ms >= 1e11, ISO ou YYYYMMDD; end padrao = agora). Retorna um resumo por simbolo.
+    """
+    if interval_to_ms(interval) is None:
+        raise ValueError(f"Intervalo nao suportado: {interval}")
+    start_ms = _to_ms(start)
+    end_ms = _to_ms(end) if end is not None else int(time.time() * 1000)
+    if end_ms < start_ms:
+        raise ValueError("end anterior a start")
+    return run_async(_backfill(symbols, interval, start_ms, end_ms))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill de candles para o armazenamento local")
+    parser.add_argument("symbols", help="lista separada por virgula, ex.: BTCUSDT,ETHUSDT")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--start", required=True, help="ISO, YYYYMMDD ou epoch ms")
+    parser.add_argument("--end", default=None, help="ISO, YYYYMMDD ou epoch ms (padrao: agora)")
+    args = parser.parse_args(argv)
+    t0 = time.time()
+    summary = backfill(args.symbols.split(","), args.interval, args.start, args.end)
+    print(json.dumps({"elapsed_sec": round(time.time() - t0, 2), "symbols": summary}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Armazenamento local de candles em colunas binarias (append-only).
+
+Layout: <CANDLE_STORE_DIR>/<SYMBOL>/<interval>/<YYYY-MM-DD>/<coluna>.bin
+- open_time: int64 (epoch ms, UTC); open/high/low/close/volume: float64.
+- Cada particao diaria so cresce; apenas candles fechados sao gravados.
+  Backfill (dados antigos) regrava a particao do dia inteira via rename atomico.
+- Leituras usam np.memmap: so as paginas da janela pedida saem do disco.
+"""
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .utils import CANDLE_STORE_DIR, CANDLE_STORE_ENABLED
+
+PRICE_COLS = ["open", "high", "low", "close", "volume"]
+_DTYPES = {"open_time": np.int64, **{c: np.float64 for c in PRICE_COLS}}
+
+_LOCKS: Dict[Tuple[str, str], threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+# ultimo open_time gravado por simbolo/intervalo (evita reler o disco a cada append)
+_LAST_MS: Dict[Tuple[str, str], int] = {}
+
+
+def _lock(key: Tuple[str, str]) -> threading.Lock:
+    with _LOCKS_GUARD:
+        lk = _LOCKS.get(key)
+        if lk is None:
+            lk = _LOCKS[key] = threading.Lock()
+        return lk
+
+
+def series_dir(symbol: str, interval: str) -> str:
+    return os.path.join(CANDLE_STORE_DIR, symbol.upper(), interval)
+
+
+def _day(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _partitions(symbol: str, interval: str) -> List[str]:
+    base = series_dir(symbol, interval)
+    try:
+        names = os.listdir(base)
+    except FileNotFoundError:
+        return []
+    for name in names:
+        # regravacao interrompida entre os dois renames: devolve a particao antiga
+        if name.endswith(".old") and name[:-4] not in names:
+            os.replace(os.path.join(base, name), os.path.join(base, name[:-4]))
+    days = sorted({n[:10] for n in names if len(n) == 10 or n.endswith(".old")})
+    return [os.path.join(base, d) for d in days]
+
+
+def _rows(part: str) -> int:
+    # menor comprimento entre as colunas: tolera um append interrompido no meio
+    n = None
+    for col, dt in _DTYPES.items():
+        try:
+            size = os.path.getsize(os.path.join(part, f"{col}.bin")) // np.dtype(dt).itemsize
+        except FileNotFoundError:
+            return 0
+        n = size if n is None else min(n, size)
+    return n or 0
+
+
+def _repair(part: str, n: int) -> None:
+    for col, dt in _DTYPES.items():
+        path = os.path.join(part, f"{col}.bin")
+        if os.path.exists(path) and os.path.getsize(path) != n * np.dtype(dt).itemsize:
+            with open(path, "r+b") as fh:
+                fh.truncate(n * np.dtype(dt).itemsize)
+
+
+def _column(part: str, col: str, n: int) -> np.ndarray:
+    if n == 0:
+        return np.empty(0, dtype=_DTYPES[col])
+    return np.memmap(os.path.join(part, f"{col}.bin"), dtype=_DTYPES[col], mode="r", shape=(n,))
+
+
+def last_open_ms(symbol: str, interval: str) -> int | None:
+    key = (symbol.upper(), interval)
+    if key in _LAST_MS:
+        return _LAST_MS[key]
+    for part in reversed(_partitions(symbol, interval)):
+        n = _rows(part)
+        if n:
+            _LAST_MS[key] = int(_column(part, "open_time", n)[n - 1])
+            return _LAST_MS[key]
+    return None
+
+
+def append_arrays(
+    symbol: str,
+    interval: str,
+    open_ms: np.ndarray,
+    cols: Dict[str, np.ndarray],
+    interval_ms: int,
+    closed: bool = False,
+) -> int:
+    """
+    Grava os candles fechados com open_time posterior ao ultimo gravado
+    (closed=True quando a fonte ja garante o fechamento, ex.: kline "x" do WS).
+    Retorna quantas linhas foram adicionadas.
+    """
+    if not CANDLE_STORE_ENABLED or interval_ms is None or len(open_ms) == 0:
+        return 0
+    key = (symbol.upper(), interval)
+    open_ms = np.asarray(open_ms, dtype=np.int64)
+    now_ms = int(time.time() * 1000)
+    with _lock(key):
+        last = last_open_ms(*key)
+        mask = np.ones(len(open_ms), dtype=bool) if closed else open_ms + interval_ms <= now_ms
+        if last is not None:
+            mask &= open_ms > last
+        if not mask.any():
+            return 0
+        t = open_ms[mask]
+        data = {c: np.asarray(cols[c], dtype=np.float64)[mask] for c in PRICE_COLS}
+        for lo, hi in _day_bounds(t):
+            part = os.path.join(series_dir(*key), _day(int(t[lo])))
+            _append_part(part, t[lo:hi], {c: v[lo:hi] for c, v in data.items()})
+        _LAST_MS[key] = int(t[-1])
+        return int(len(t))
+
+
+def _day_bounds(t: np.ndarray):
+    days = (t // 86_400_000).astype(np.int64)
+    bounds = np.flatnonzero(np.diff(days)) + 1
+    return zip(np.r_[0, bounds], np.r_[bounds, len(t)])
+
+
+def _append_part(part: str, t: np.ndarray, data: Dict[str, np.ndarray]) -> None:
+    os.makedirs(part, exist_ok=True)
+    _repair(part, _rows(part))
+    with open(os.path.join(part, "open_time.bin"), "ab") as fh:
+        fh.write(t.tobytes())
+    for c in PRICE_COLS:
+        with open(os.path.join(part, f"{c}.bin"), "ab") as fh:
+            fh.write(data[c].tobytes())
+
+
+def _rewrite_part(part: str, t: np.ndarray, data: Dict[str, np.ndarray]) -> None:
+    tmp = f"{part}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    _append_part(tmp, t, data)
+    if os.path.isdir(part):
+        os.replace(part, f"{part}.old")
+    os.replace(tmp, part)
+    shutil.rmtree(f"{part}.old", ignore_errors=True)
+
+
+def merge(symbol: str, interval: str, df: pd.DataFrame, interval_ms: int | None) -> int:
+    """
+    Insere candles fechados em qualquer ponto do historico (backfill), sem
+    duplicar open_time; o dado novo prevalece. Retorna as linhas recebidas.
+    """
+    if not CANDLE_STORE_ENABLED or df is None or df.empty or interval_ms is None:
+        return 0
+    key = (symbol.upper(), interval)
+    t_new = df["open_time"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    mask = t_new + interval_ms <= int(time.time() * 1000)
+    if not mask.any():
+        return 0
+    order = np.argsort(t_new[mask], kind="stable")
+    t_new = t_new[mask][order]
+    new = {c: df[c].to_numpy(dtype=np.float64)[mask][order] for c in PRICE_COLS}
+    with _lock(key):
+        for lo, hi in _day_bounds(t_new):
+            part = os.path.join(series_dir(*key), _day(int(t_new[lo])))
+            n = _rows(part) if os.path.isdir(part) else 0
+            t_old = _column(part, "open_time", n)
+            if n == 0 or t_new[lo] > t_old[n - 1]:
+                _append_part(part, t_new[lo:hi], {c: v[lo:hi] for c, v in new.items()})
+                continue
+            t = np.concatenate([t_old, t_new[lo:hi]])
+            data = {
+                c: np.concatenate([_column(part, c, n), new[c][lo:hi]]) for c in PRICE_COLS
+            }
+            # ultima ocorrencia de cada open_time (o dado novo) em ordem temporal
+            rev = t[::-1]
+            _, first = np.unique(rev, return_index=True)
+            keep = len(t) - 1 - first
+            _rewrite_part(part, t[keep], {c: v[keep] for c, v in data.items()})
+        _LAST_MS.pop(key, None)
+    return int(len(t_new))
+
+
+def append(symbol: str, interval: str, df: pd.DataFrame, interval_ms: int | None) -> int:
+    if df is None or df.empty or interval_ms is None:
+        return 0
+    open_ms = df["open_time"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    return append_arrays(symbol, interval, open_ms, {c: df[c].to_numpy() for c in PRICE_COLS}, interval_ms)
+
+
+def read(
+    symbol: str,
+    interval: str,
+    limit: int | None = None,
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+) -> pd.DataFrame:
+    """
+    Le os ultimos `limit` candles (opcionalmente dentro de [start_ms, end_ms])
+    no mesmo formato de get_klines: open_time naive (UTC) + OHLCV float.
+    """
+    empty = pd.DataFrame(columns=["open_time"] + PRICE_COLS)
+    if not CANDLE_STORE_ENABLED:
+        return empty
+    chunks = []
+    total = 0
+    for part in reversed(_partitions(symbol, interval)):
+        n = _rows(part)
+        if n == 0:
+            continue
+        t = _column(part, "open_time", n)
+        if start_ms is not None and t[n - 1] < start_ms:
+            break
+        lo = 0 if start_ms is None else int(np.searchsorted(t, start_ms, side="left"))
+        hi = n if end_ms is None else int(np.searchsorted(t, end_ms, side="right"))
+        if hi <= lo:
+            continue
+        if limit is not None and total + (hi - lo) > limit:
+            lo = hi - (limit - total)
+        chunks.append((part, n, lo, hi))
+        total += hi - lo
+        if limit is not None and total >= limit:
+            break
+    if not chunks:
+        return empty
+    chunks.reverse()
+    out = {}
+    for col in _DTYPES:
+        out[col] = np.concatenate([_column(part, col, n)[lo:hi] for part, n, lo, hi in chunks])
+    df = pd.DataFrame({c: out[c] for c in PRICE_COLS})
+    df.insert(0, "open_time", pd.to_datetime(out["open_time"], unit="ms"))
+    return df
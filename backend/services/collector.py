@@ -1,101 +1,552 @@
+import asyncio
+import random
+import threading
 import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+
 import httpx
+import numpy as np
 import pandas as pd
+from . import candle_store, kline_decode, singleflight
+from .latency import LatencyHistogram
+from .ratelimit import CircuitBreaker, RateLimitedError, TokenBucket
 from .utils import (
     EXCHANGE,
     BINGX_BASE_URL,
     BINANCE_BASE_URL,
     CANDLES_CACHE_SEC,
+    CANDLES_CACHE_MAX_MB,
     HTTP_RETRIES,
     HTTP_BACKOFF_BASE,
+    HTTP_TIMEOUT_SEC,
+    BINGX_MAX_CONCURRENCY,
+    BINANCE_MAX_CONCURRENCY,
+    BINGX_WEIGHT_PER_MIN,
+    BINANCE_WEIGHT_PER_MIN,
+    CIRCUIT_FAIL_THRESHOLD,
+    CIRCUIT_COOLOFF_SEC,
+    HEDGE_ENABLED,
+    HEDGE_QUANTILE,
+    HEDGE_DELAY_SEC,
 )
 
-# In-memory cache to reduce repeated HTTP calls per symbol/interval/limit
-_CANDLE_CACHE = {}
+# Cache LRU por (simbolo, intervalo) -> (ts, frame, nbytes, depth). Guarda o frame
+# mais profundo ja buscado (somente leitura), serve qualquer limit menor como fatia
+# da cauda e e a base do refresh incremental. Limitado por CANDLES_CACHE_MAX_MB.
+# So e acessado de dentro do loop do coletor.
+_CANDLE_CACHE: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+_CACHE_BYTES = 0
+# misses simultaneos do mesmo (simbolo, intervalo, limit) viram um unico fetch
+_FLIGHT = singleflight.group("klines")
+
+# Maximo de candles por pagina em cada exchange; paginas de range usam o menor
+# (o fallback BingX -> Binance nao pode truncar a pagina)
+_PAGE_LIMIT = {"BINGX": 1440, "BINANCE": 1000}
+PAGE_ROWS = min(_PAGE_LIMIT.values())
+
+_INTERVAL_UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+# Loop dedicado do coletor: um unico AsyncClient (keep-alive) atende todas as
+# threads do FastAPI; chamadas sincronas apenas submetem corrotinas a este loop.
+_LOOP: asyncio.AbstractEventLoop | None = None
+_LOOP_LOCK = threading.Lock()
+_CLIENT: httpx.AsyncClient | None = None
+_SEMAPHORES: Dict[str, asyncio.Semaphore] = {}
+_MAX_CONCURRENCY = {"BINGX": BINGX_MAX_CONCURRENCY, "BINANCE": BINANCE_MAX_CONCURRENCY}
+_WEIGHT_PER_MIN = {"BINGX": BINGX_WEIGHT_PER_MIN, "BINANCE": BINANCE_WEIGHT_PER_MIN}
+# peso de uma chamada de klines (Binance /api/v3/klines = 2)
+_KLINES_WEIGHT = {"BINGX": 1, "BINANCE": 2}
+_BUCKETS: Dict[str, TokenBucket] = {}
+# exchange seguinte quando esta falha; a Binance e sempre o ultimo salto
+# (EXCHANGE=BINANCE, fallback e perna do hedge), entao la 429/418 espera o Retry-After
+_FALLBACK = {"BINGX": "BINANCE"}
+# exchange fora do ar: falha rapido (e cai no fallback) durante o cooloff
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+# latencia das respostas OK por exchange (base do atraso do hedge)
+_LATENCY: Dict[str, LatencyHistogram] = {}
+# amostras minimas antes de confiar no quantil medido
+_HEDGE_MIN_SAMPLES = 20
+_HEDGE_STATS = {"calls": 0, "hedged": 0, "secondary_won": 0}
+
+
+def interval_to_ms(interval: str) -> int | None:
+    """Duracao de um candle em ms ("1m", "4h", "1d"...); None se desconhecido."""
+    try:
+        return int(interval[:-1]) * _INTERVAL_UNIT_MS[interval[-1]]
+    except (KeyError, ValueError, IndexError):
+        return None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="collector-http", daemon=True)
+            thread.start()
+            _LOOP = loop
+        return _LOOP
+
+
+def run_async(coro):
+    """Executa uma corrotina no loop do coletor e espera o resultado."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def _client() -> httpx.AsyncClient:
+    # so e acessado de dentro do loop do coletor
+    global _CLIENT
+    if _CLIENT is None:
+        total = sum(_MAX_CONCURRENCY.values())
+        _CLIENT = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT_SEC,
+            limits=httpx.Limits(max_connections=total, max_keepalive_connections=total),
+        )
+    return _CLIENT
 
 
-def _get_with_retries(url: str, params: dict) -> httpx.Response:
+def _semaphore(exchange: str) -> asyncio.Semaphore:
+    sem = _SEMAPHORES.get(exchange)
+    if sem is None:
+        sem = asyncio.Semaphore(max(1, _MAX_CONCURRENCY.get(exchange, 10)))
+        _SEMAPHORES[exchange] = sem
+    return sem
+
+
+def _bucket(exchange: str) -> TokenBucket:
+    bucket = _BUCKETS.get(exchange)
+    if bucket is None:
+        per_min = max(1, _WEIGHT_PER_MIN.get(exchange, 1200))
+        bucket = _BUCKETS[exchange] = TokenBucket(per_min, per_min / 60.0)
+    return bucket
+
+
+def _breaker(exchange: str) -> CircuitBreaker:
+    breaker = _BREAKERS.get(exchange)
+    if breaker is None:
+        breaker = _BREAKERS[exchange] = CircuitBreaker(
+            exchange, CIRCUIT_FAIL_THRESHOLD, CIRCUIT_COOLOFF_SEC
+        )
+    return breaker
+
+
+def _latency(exchange: str) -> LatencyHistogram:
+    hist = _LATENCY.get(exchange)
+    if hist is None:
+        hist = _LATENCY[exchange] = LatencyHistogram()
+    return hist
+
+
+def _retry_after(r: httpx.Response) -> float:
+    try:
+        return max(1.0, float(r.headers.get("Retry-After", "")))
+    except ValueError:
+        return 60.0
+
+
+async def _get_with_retries(exchange: str, url: str, params: dict, weight: int = 1) -> httpx.Response:
+    breaker = _breaker(exchange)
+    bucket = _bucket(exchange)
     last_err = None
     for attempt in range(HTTP_RETRIES + 1):
+        # circuito aberto: CircuitOpenError na hora, sem gastar o orcamento de retries
+        breaker.check()
+        if bucket.paused_for() > 0 and exchange in _FALLBACK:
+            # dentro do Retry-After de um 429/418: falha ja e o chamador usa o fallback
+            raise RateLimitedError(f"{exchange}: rate limit por {bucket.paused_for():.0f}s")
         try:
-            r = httpx.get(url, params=params, timeout=20)
-            r.raise_for_status()
-            return r
-        except Exception as e:
+            await bucket.acquire(weight)
+            t0 = time.monotonic()
+            async with _semaphore(exchange):
+                r = await _client().get(url, params=params)
+        except asyncio.CancelledError:
+            breaker.abort()
+            raise
+        except httpx.HTTPError as e:
+            breaker.failure()
             last_err = e
-            sleep = HTTP_BACKOFF_BASE * (2 ** attempt)
-            time.sleep(sleep)
+        else:
+            used = r.headers.get("X-MBX-USED-WEIGHT-1M")
+            if used and used.isdigit():
+                bucket.sync_used(int(used))
+            if r.status_code < 400:
+                breaker.success()
+                _latency(exchange).observe(time.monotonic() - t0)
+                return r
+            last_err = httpx.HTTPStatusError(
+                f"{exchange} HTTP {r.status_code}", request=r.request, response=r
+            )
+            if r.status_code in (418, 429):
+                # rate limit: segura todas as chamadas da exchange pelo tempo pedido;
+                # com fallback desiste ja, sem ele o acquire seguinte espera a pausa
+                bucket.pause(_retry_after(r))
+                if r.status_code == 418:
+                    breaker.failure()
+                if exchange in _FALLBACK:
+                    raise last_err
+                continue
+            if r.status_code >= 500:
+                breaker.failure()
+            else:
+                # 4xx (simbolo invalido etc.): a exchange esta de pe, repetir nao ajuda
+                breaker.success()
+                raise last_err
+        if attempt < HTTP_RETRIES:
+            # backoff com jitter no loop do coletor; nenhuma thread fica dormindo
+            sleep = HTTP_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.0)
+            await asyncio.sleep(sleep)
     # raise last error if all attempts fail
     raise last_err
 
 
-def _bingx_klines(symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
+async def _exchange_stats() -> Dict[str, dict]:
+    stats = {
+        ex: {
+            "breaker": _breaker(ex).state(),
+            "bucket": _bucket(ex).state(),
+            "latency": _latency(ex).snapshot(),
+        }
+        for ex in _MAX_CONCURRENCY
+    }
+    stats["hedge"] = {"enabled": HEDGE_ENABLED, "delay_sec": round(_hedge_delay("BINGX"), 4), **_HEDGE_STATS}
+    return stats
+
+
+def exchange_stats() -> Dict[str, dict]:
+    return run_async(_exchange_stats())
+
+
+async def _bingx_klines(
+    symbol: str,
+    interval: str,
+    limit: int = 500,
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+) -> pd.DataFrame:
     url = f"{BINGX_BASE_URL}/openApi/swap/v3/quote/klines"
     params = {"symbol": symbol, "interval": interval, "limit": limit}
-    r = _get_with_retries(url, params)
-    data = r.json().get("data", [])
+    if start_ms is not None:
+        params["startTime"] = int(start_ms)
+    if end_ms is not None:
+        params["endTime"] = int(end_ms)
+    r = await _get_with_retries("BINGX", url, params, _KLINES_WEIGHT["BINGX"])
+    data = kline_decode.loads(r.content).get("data", [])
     if not data:
         # force fallback if BingX returns empty
         raise ValueError("BingX klines vazio")
-    cols = ["open_time", "open", "high", "low", "close", "volume"]
-    df = pd.DataFrame(data, columns=cols)
-    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
-    df = df.astype(
-        {"open": float, "high": float, "low": float, "close": float, "volume": float}
-    )
-    return df
+    return kline_decode.decode_rows(data)
 
 
-def _binance_klines(symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
+async def _binance_klines(
+    symbol: str,
+    interval: str,
+    limit: int = 500,
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+) -> pd.DataFrame:
     url = f"{BINANCE_BASE_URL}/api/v3/klines"
     params = {"symbol": symbol, "interval": interval, "limit": limit}
-    r = _get_with_retries(url, params)
-    raw = r.json()
-    df = pd.DataFrame(
-        raw,
-        columns=[
-            "open_time",
-            "open",
-            "high",
-            "low",
-            "close",
-            "volume",
-            "close_time",
-            "qav",
-            "trades",
-            "taker_base",
-            "taker_quote",
-            "ignore",
-        ],
-    )
-    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
-    df = df[["open_time", "open", "high", "low", "close", "volume"]]
-    for col in ["open", "high", "low", "close", "volume"]:
-        df[col] = df[col].astype(float)
-    return df
+    if start_ms is not None:
+        params["startTime"] = int(start_ms)
+    if end_ms is not None:
+        params["endTime"] = int(end_ms)
+    r = await _get_with_retries("BINANCE", url, params, _KLINES_WEIGHT["BINANCE"])
+    return kline_decode.decode_binance(r.content)
 
 
-def get_klines(symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
-    symbol = str(symbol).upper()
-    key = (symbol, interval, int(limit))
-    now = time.time()
-    cached = _CANDLE_CACHE.get(key)
-    if cached:
-        ts, df_cached = cached
-        if (now - ts) < CANDLES_CACHE_SEC and df_cached is not None:
-            return df_cached.copy()
+def _hedge_delay(exchange: str) -> float:
+    hist = _latency(exchange)
+    if hist.total < _HEDGE_MIN_SAMPLES:
+        return HEDGE_DELAY_SEC
+    return hist.quantile(HEDGE_QUANTILE)
+
+
+async def _hedged_klines(*args) -> pd.DataFrame:
+    """
+    BingX primeiro; se nao responder em _hedge_delay (ou falhar antes), dispara
+    a Binance. A primeira resposta valida vence e a outra e cancelada.
+    """
+    _HEDGE_STATS["calls"] += 1
+    delay = _hedge_delay("BINGX")
+    t0 = time.monotonic()
+    primary = asyncio.ensure_future(_bingx_klines(*args))
+    tasks = {primary}
+    try:
+        await asyncio.wait(tasks, timeout=delay)
+        if primary.done() and primary.exception() is None:
+            return primary.result()
+        _HEDGE_STATS["hedged"] += 1
+        tasks.add(asyncio.ensure_future(_binance_klines(*args)))
+        pending = set(tasks)
+        last_err = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        _HEDGE_STATS["secondary_won"] += 1
+                    return task.result()
+                last_err = task.exception()
+        raise last_err
+    finally:
+        if not primary.done():
+            # BingX perdeu e sera cancelada: amostra censurada (levaria pelo menos
+            # isso), senao o p95 so veria as respostas rapidas e cairia
+            _latency("BINGX").observe(max(time.monotonic() - t0, delay))
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
 
-    if EXCHANGE == "BINGX":
+async def _exchange_klines(
+    symbol: str,
+    interval: str,
+    limit: int,
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+) -> pd.DataFrame:
+    if EXCHANGE == "BINGX" and HEDGE_ENABLED:
+        df = await _hedged_klines(symbol, interval, limit, start_ms, end_ms)
+    elif EXCHANGE == "BINGX":
         try:
-            df = _bingx_klines(symbol, interval, limit)
+            df = await _bingx_klines(symbol, interval, limit, start_ms, end_ms)
         except Exception:
-            df = _binance_klines(symbol, interval, limit)
+            df = await _binance_klines(symbol, interval, limit, start_ms, end_ms)
     else:
-        df = _binance_klines(symbol, interval, limit)
-
-    if not df.empty:
-        df = df.sort_values("open_time").reset_index(drop=True)
-        for col in ["open", "high", "low", "close", "volume"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    _CANDLE_CACHE[key] = (now, df)
+        df = await _binance_klines(symbol, interval, limit, start_ms, end_ms)
+    # o decoder ja entrega open_time ordenado e colunas float64
     return df
+
+
+def page_ranges(start_ms: int, end_ms: int, step: int):
+    """Divide [start_ms, end_ms] em paginas de PAGE_ROWS candles alinhadas ao intervalo."""
+    start_ms -= start_ms % step
+    span = PAGE_ROWS * step
+    return [(lo, min(lo + span - step, end_ms)) for lo in range(start_ms, end_ms + 1, span)]
+
+
+def _dedupe(frames) -> pd.DataFrame:
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=["open_time", "open", "high", "low", "close", "volume"])
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates("open_time", keep="last").sort_values("open_time")
+    return df.reset_index(drop=True)
+
+
+async def fetch_page(symbol: str, interval: str, start_ms: int, end_ms: int) -> pd.DataFrame:
+    return await _exchange_klines(symbol, interval, PAGE_ROWS, start_ms, end_ms)
+
+
+async def _fetch_range(symbol: str, interval: str, start_ms: int, end_ms: int) -> pd.DataFrame:
+    step = interval_to_ms(interval)
+    pages = await asyncio.gather(
+        *[fetch_page(symbol, interval, lo, hi) for lo, hi in page_ranges(start_ms, end_ms, step)]
+    )
+    return _dedupe(pages)
+
+
+async def _fetch_window(symbol: str, interval: str, limit: int, now: float) -> pd.DataFrame:
+    step = interval_to_ms(interval)
+    if step is None or limit <= PAGE_ROWS:
+        return await _exchange_klines(symbol, interval, limit)
+    # janela maior que uma pagina: baixa as paginas em paralelo
+    now_ms = int(now * 1000)
+    df = await _fetch_range(symbol, interval, now_ms - (limit - 1) * step, now_ms)
+    return df.tail(limit).reset_index(drop=True)
+
+
+def get_klines_range(symbol: str, interval: str, start_ms: int, end_ms: int) -> pd.DataFrame:
+    """Candles em [start_ms, end_ms] (paginado, sem duplicatas em open_time)."""
+    if interval_to_ms(interval) is None:
+        raise ValueError(f"Intervalo nao suportado: {interval}")
+    return run_async(_fetch_range(str(symbol).upper(), interval, int(start_ms), int(end_ms)))
+
+
+def _tail_request(frame: pd.DataFrame | None, interval: str, limit: int, now: float):
+    """
+    (start_ms, rows) para buscar so a cauda do frame em cache, ou None quando
+    e preciso baixar a janela inteira (sem frame, frame raso ou lacuna grande).
+    """
+    step = interval_to_ms(interval)
+    if step is None or frame is None or frame.empty or len(frame) < limit:
+        return None
+    last_ms = int(frame["open_time"].iloc[-1].value // 10**6)
+    # refaz o ultimo candle (ainda aberto no fetch anterior) + os novos
+    rows = int(now * 1000 - last_ms) // step + 2
+    if rows > min(limit, PAGE_ROWS):
+        return None
+    return last_ms, rows
+
+
+def _merge_tail(frame: pd.DataFrame, tail: pd.DataFrame) -> pd.DataFrame:
+    if tail.empty:
+        return frame
+    first = tail["open_time"].iloc[0]
+    head = frame[frame["open_time"] < first]
+    merged = pd.concat([head, tail], ignore_index=True)
+    return merged.tail(max(len(frame), len(tail))).reset_index(drop=True)
+
+
+def _store_read(symbol: str, interval: str, limit: int) -> pd.DataFrame:
+    try:
+        return candle_store.read(symbol, interval, limit)
+    except Exception:
+        # disco local e opcional: na duvida, vai para a rede
+        return pd.DataFrame()
+
+
+def _store_append(symbol: str, interval: str, df: pd.DataFrame, backfill: bool = False) -> None:
+    # backfill: o disco tinha lacunas; merge preenche no meio, append so grava depois do ultimo
+    try:
+        write = candle_store.merge if backfill else candle_store.append
+        write(symbol, interval, df, interval_to_ms(interval))
+    except Exception:
+        pass
+
+
+def _contiguous(frame: pd.DataFrame, interval: str) -> bool:
+    """True se o frame cobre todos os candles entre o primeiro e o ultimo open_time."""
+    step = interval_to_ms(interval)
+    if step is None or frame.empty:
+        return False
+    first_ms = int(frame["open_time"].iloc[0].value // 10**6)
+    last_ms = int(frame["open_time"].iloc[-1].value // 10**6)
+    return (last_ms - first_ms) // step + 1 == len(frame)
+
+
+def _freeze(df: pd.DataFrame) -> pd.DataFrame:
+    # colunas somente leitura: quem recebe uma fatia nao consegue alterar o cache
+    cols = {}
+    for col in df.columns:
+        arr = np.ascontiguousarray(df[col].to_numpy())
+        arr.flags.writeable = False
+        cols[col] = arr
+    return pd.DataFrame(cols, copy=False)
+
+
+def _tail_view(frame: pd.DataFrame, limit: int) -> pd.DataFrame:
+    view = frame.iloc[len(frame) - min(max(int(limit), 0), len(frame)):]
+    view.index = pd.RangeIndex(len(view))
+    return view
+
+
+def _cache_put(key: Tuple[str, str], ts: float, frame: pd.DataFrame, depth: int) -> None:
+    global _CACHE_BYTES
+    old = _CANDLE_CACHE.pop(key, None)
+    if old is not None:
+        _CACHE_BYTES -= old[2]
+    nbytes = int(sum(frame[c].to_numpy().nbytes for c in frame.columns))
+    _CANDLE_CACHE[key] = (ts, frame, nbytes, depth)
+    _CACHE_BYTES += nbytes
+    budget = CANDLES_CACHE_MAX_MB * 1024 * 1024
+    while _CACHE_BYTES > budget and len(_CANDLE_CACHE) > 1:
+        _, evicted = _CANDLE_CACHE.popitem(last=False)
+        _CACHE_BYTES -= evicted[2]
+
+
+async def _cache_stats() -> Dict[str, int]:
+    return {
+        "entries": len(_CANDLE_CACHE),
+        "bytes": _CACHE_BYTES,
+        "budget_bytes": CANDLES_CACHE_MAX_MB * 1024 * 1024,
+        "rows": int(sum(len(entry[1]) for entry in _CANDLE_CACHE.values())),
+    }
+
+
+def cache_stats() -> Dict[str, int]:
+    # o cache so e tocado no loop do coletor: le la, como exchange_stats
+    return run_async(_cache_stats())
+
+
+async def _fetch_klines(symbol: str, interval: str, limit: int) -> pd.DataFrame:
+    entry = _CANDLE_CACHE.get((symbol, interval))
+    if entry is not None:
+        ts, frame, _, depth = entry
+        _CANDLE_CACHE.move_to_end((symbol, interval))
+        if (time.time() - ts) < CANDLES_CACHE_SEC and limit <= depth:
+            return _tail_view(frame, limit)
+    frame = await _FLIGHT.do_async(
+        (symbol, interval, int(limit)), lambda: _refresh_klines(symbol, interval, limit)
+    )
+    # cada chamador recebe a propria view (o frame compartilhado e somente leitura)
+    return _tail_view(frame, limit)
+
+
+async def _refresh_klines(symbol: str, interval: str, limit: int) -> pd.DataFrame:
+    key = (symbol, interval)
+    now = time.time()
+    frame, depth = None, 0
+    entry = _CANDLE_CACHE.get(key)
+    if entry is not None:
+        _, frame, _, depth = entry
+
+    backfill = False
+    if frame is None or depth < limit:
+        # processo frio: historico local primeiro, rede so para a cauda; janela
+        # com lacuna no disco nao serve (a cauda nao a preencheria)
+        stored = await asyncio.to_thread(_store_read, symbol, interval, limit)
+        frame = stored if len(stored) >= limit and _contiguous(stored, interval) else None
+        backfill = frame is None and not stored.empty
+    tail_req = _tail_request(frame, interval, limit, now)
+    if tail_req is None:
+        frame = await _fetch_window(symbol, interval, limit, now)
+        # a exchange pode ter menos historico que o pedido: vale como profundidade
+        depth = max(int(limit), len(frame))
+    else:
+        start_ms, rows = tail_req
+        tail = await _exchange_klines(symbol, interval, rows, start_ms)
+        frame = _merge_tail(frame, tail)
+        depth = max(depth, int(limit), len(frame))
+    frame = _freeze(frame)
+    _cache_put(key, now, frame, depth)
+    await asyncio.to_thread(_store_append, symbol, interval, frame, backfill)
+    return frame
+
+
+async def _gather_klines(symbols: Iterable[str], interval: str, limit: int) -> Dict[str, object]:
+    uniq = list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+    results = await asyncio.gather(
+        *[_fetch_klines(s, interval, limit) for s in uniq],
+        return_exceptions=True,
+    )
+    return dict(zip(uniq, results))
+
+
+def get_klines_many(symbols: Iterable[str], interval: str, limit: int = 500) -> Dict[str, pd.DataFrame]:
+    """
+    Busca candles de varios simbolos em paralelo (um round trip para o lote),
+    respeitando o limite de concorrencia por exchange.
+    Simbolos que falharem ficam de fora do resultado.
+    """
+    results = run_async(_gather_klines(symbols, interval, limit))
+    return {s: r for s, r in results.items() if not isinstance(r, BaseException)}
+
+
+async def _await_in_loop(coro):
+    # aguarda no loop de quem chamou (ex.: rota async do FastAPI) sem bloquear thread
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _get_loop()))
+
+
+async def get_klines_many_async(
+    symbols: Iterable[str], interval: str, limit: int = 500
+) -> Dict[str, pd.DataFrame]:
+    results = await _await_in_loop(_gather_klines(symbols, interval, limit))
+    return {s: r for s, r in results.items() if not isinstance(r, BaseException)}
+
+
+async def get_klines_async(symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
+    symbol = str(symbol).upper()
+    result = (await _await_in_loop(_gather_klines([symbol], interval, limit)))[symbol]
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def get_klines(symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
+    symbol = str(symbol).upper()
+    result = run_async(_gather_klines([symbol], interval, limit))[symbol]
+    if isinstance(result, BaseException):
+        raise result
+    return result
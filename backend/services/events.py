@@ -0,0 +1,87 @@
+"""
+Barramento de eventos em processo. Publicadores (threads do stream/worker)
+chamam bus.publish; cada assinante (handler async, ex.: SSE) tem sua fila no
+proprio loop. A mensagem e serializada uma unica vez por publicacao e o mesmo
+bytes vai para todos os assinantes.
+"""
+import asyncio
+import json
+import threading
+from typing import Any, Dict, Set
+
+
+def encode_sse(event: str, data: Any) -> bytes:
+    body = json.dumps(data, separators=(",", ":"), default=str, allow_nan=False)
+    return f"event: {event}\ndata: {body}\n\n".encode()
+
+
+class Subscription:
+    def __init__(self, maxsize: int) -> None:
+        # criada dentro do loop do assinante
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def _put(self, msg: bytes) -> None:
+        # cliente lento: descarta o mais antigo em vez de travar o publicador
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(msg)
+
+    async def get(self, timeout: float | None = None) -> bytes | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subs: Set[Subscription] = set()
+        self.published = 0
+
+    def subscribe(self, maxsize: int = 100) -> Subscription:
+        sub = Subscription(maxsize)
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+
+    def subscribers(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+    def publish(self, event: str, data: Any) -> int:
+        """Entrega a todos os assinantes (thread-safe). Retorna quantos receberam."""
+        with self._lock:
+            subs = list(self._subs)
+        if not subs:
+            return 0
+        msg = encode_sse(event, data)
+        sent = 0
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._put, msg)
+                sent += 1
+            except RuntimeError:
+                # loop do assinante ja fechou
+                self.unsubscribe(sub)
+        self.published += 1
+        return sent
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            subs = list(self._subs)
+        return {
+            "subscribers": len(subs),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subs),
+        }
+
+
+bus = EventBus()
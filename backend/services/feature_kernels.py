@@ -0,0 +1,141 @@
+"""
+Caminho NumPy de add_indicators (FEATURES_ENGINE=numpy): as mesmas colunas do
+caminho `ta`, calculadas direto sobre arrays com o tempo no ultimo eixo, de
+modo que (n,) e (simbolos, n) usam o mesmo codigo.
+
+Recursoes (ewm e Wilder) e janelas moveis passam pelos kernels Cython do
+pandas (uma chamada sobre o bloco inteiro), o que mantem a numerica do `ta`;
+o resto e aritmetica NumPy vetorizada. Bordas iguais ao `ta`: ATR ausente com
+menos de 14 barras, ADX com menos de 28, zeros antes do aquecimento.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+OHLCV = ("open", "high", "low", "close", "volume")
+_W = 14  # RSI, ATR e ADX
+
+
+def _shift(x: np.ndarray, k: int) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    out[..., k:] = x[..., :-k]
+    return out
+
+
+def _block(x: np.ndarray) -> pd.DataFrame:
+    # (..., n) -> DataFrame (n, series) para os kernels do pandas
+    return pd.DataFrame(x.reshape(-1, x.shape[-1]).T)
+
+
+def _unblock(df: pd.DataFrame, shape) -> np.ndarray:
+    return df.to_numpy().T.reshape(shape)
+
+
+def _ewm(x: np.ndarray, alpha: float, min_periods: int = 0) -> np.ndarray:
+    out = _block(x).ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean()
+    return _unblock(out, x.shape)
+
+
+def _rolling(x: np.ndarray, window: int, min_periods: int | None = None, ddof: int | None = None):
+    """Media movel; com `ddof`, retorna (media, desvio padrao) da mesma janela."""
+    roll = _block(x).rolling(window, min_periods=min_periods)
+    mean = _unblock(roll.mean(), x.shape)
+    if ddof is None:
+        return mean
+    return mean, _unblock(roll.std(ddof=ddof), x.shape)
+
+
+def _wilder(seed: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    y[0] = seed, y[i] = y[i-1] * 13/14 + values[i-1] / 14 (mesma recursao do ta,
+    escrita como ewm alpha=1/14 sobre [seed, values...]).
+    """
+    return _ewm(np.concatenate([seed[..., None], values], axis=-1), 1.0 / _W)
+
+
+def indicator_arrays(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray, v: np.ndarray) -> Dict[str, np.ndarray]:
+    """Colunas de add_indicators (na mesma ordem) para arrays float64 (..., n)."""
+    n = c.shape[-1]
+    out: Dict[str, np.ndarray] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # RSI 14 (diff da barra 0 conta como 0, como no ta)
+        diff = np.zeros_like(c)
+        diff[..., 1:] = c[..., 1:] - c[..., :-1]
+        up, dn = _ewm(np.stack([np.where(diff > 0, diff, 0.0), np.where(diff < 0, -diff, 0.0)]), 1.0 / _W, _W)
+        rsi = np.where(dn == 0, 100.0, 100.0 - 100.0 / (1.0 + up / dn))
+        rsi[np.isnan(dn)] = np.nan
+        out["rsi14"] = rsi
+        out["rsi_slope3"] = rsi - _shift(rsi, 3)
+        rsi_ma, rsi_sd = _rolling(rsi, 50, 10, ddof=1)
+        out["rsi_z"] = (rsi - rsi_ma) / (rsi_sd + 1e-9)
+
+        # Variacoes
+        for k in (1, 5, 15):
+            out[f"ret_{k}"] = c / _shift(c, k) - 1.0
+
+        # Volume
+        vol_ma, vol_sd = _rolling(v, 20, ddof=1)
+        out["vol_ma20"], out["vol_std20"] = vol_ma, vol_sd
+        out["vol_z"] = (v - vol_ma) / (vol_sd + 1e-9)
+        out["vol_ratio"] = v / (vol_ma + 1e-9)
+
+        # Pavios e corpo
+        hl = h - l
+        out["upper_wick"] = (h - np.maximum(c, o)) / (hl + 1e-9)
+        out["lower_wick"] = (np.minimum(c, o) - l) / (hl + 1e-9)
+        rng = np.where(hl == 0, np.nan, hl)
+        out["body_norm"] = np.clip((c - o) / (rng + 1e-9), -5, 5)
+        out["wick_ratio"] = np.clip((h - c) / (rng + 1e-9), 0, 1)
+
+        # EMAs
+        for span in (20, 50, 200):
+            out[f"ema{span}"] = _ewm(c, 2.0 / (span + 1.0), span)
+        out["ema_dist20"] = (c - out["ema20"]) / (out["ema20"] + 1e-9)
+        out["ema_dist50"] = (c - out["ema50"]) / (out["ema50"] + 1e-9)
+        out["ema200_slope"] = out["ema200"] - _shift(out["ema200"], 1)
+
+        # Bollinger (20, 2)
+        mavg, mstd = _rolling(c, 20, ddof=0)
+        out["bb_high"] = mavg + 2.0 * mstd
+        out["bb_low"] = mavg - 2.0 * mstd
+        width = np.abs(out["bb_high"] - out["bb_low"])
+        out["bb_bw"] = width / (c + 1e-9)
+        out["bb_pos"] = (c - out["bb_low"]) / (width + 1e-9)
+
+        pc = _shift(c, 1)
+        # ATR 14
+        if n >= _W:
+            tr = np.fmax(hl, np.fmax(np.abs(h - pc), np.abs(l - pc)))  # barra 0: h - l
+            atr = np.zeros_like(c)
+            atr[..., _W - 1:] = _wilder(tr[..., :_W].mean(axis=-1), tr[..., _W:])
+            out["atr14"] = atr
+            out["atr_ratio"] = atr / (_rolling(c, 5) + 1e-9)
+
+        # ADX 14: somas das barras 1..14, DX a partir da barra 14, ADX na 27
+        if n >= 2 * _W:
+            dm = np.maximum(h, pc) - np.minimum(l, pc)
+            du = h - _shift(h, 1)
+            dd = _shift(l, 1) - l
+            pos = np.where((du > dd) & (du > 0), du, 0.0)
+            neg = np.where((dd > du) & (dd > 0), dd, 0.0)
+            # somas de Wilder divididas por 14 (a escala some nas razoes abaixo)
+            x = np.stack([dm, pos, neg])
+            trs, dip, din = _wilder(x[..., 1:_W + 1].sum(axis=-1) / _W, x[..., _W + 1:])
+            dip = np.where(trs != 0, 100 * (dip / trs), 0.0)
+            din = np.where(trs != 0, 100 * (din / trs), 0.0)
+            dx = np.where(dip + din != 0, 100 * np.abs((dip - din) / (dip + din)), 0.0)
+            adx = np.zeros_like(c)
+            adx[..., 2 * _W - 1:] = _wilder(dx[..., :_W].mean(axis=-1), dx[..., _W:])
+            out["adx14"] = adx
+    return out
+
+
+def add_indicators_np(df: pd.DataFrame) -> pd.DataFrame:
+    """Mesmo resultado de features.add_indicators, montado num unico DataFrame."""
+    arrays = {col: df[col].to_numpy(dtype=np.float64) for col in OHLCV}
+    data = {col: arrays.get(col, df[col]) for col in df.columns}
+    data.update(indicator_arrays(*(arrays[col] for col in OHLCV)))
+    out = pd.DataFrame(data, index=df.index)
+    out.attrs = dict(df.attrs)
+    return out
@@ -0,0 +1,113 @@
+"""
+Perfil de memoria compacto das features (FEATURES_MEMORY_PROFILE=compact):
+indicadores em um unico array float32 (barras x colunas, C-contiguo) com mapa
+nome -> coluna, mais open_time (int64 ms) e close (float64, usado como preco
+de entrada). Colunas intermediarias que nenhum consumidor le (DROP_COMPACT)
+nao sao guardadas.
+"""
+import threading
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+# so servem para derivar vol_z/vol_ratio e bb_bw/bb_pos
+DROP_COMPACT = ("vol_ma20", "vol_std20", "bb_high", "bb_low")
+# ficam fora da matriz (precisao de preco/timestamp) ou sao candle bruto
+_SKIP = ("open_time", "open", "high", "low", "close", "volume")
+
+
+class FeatureMatrix:
+    def __init__(self, open_ms: np.ndarray, close: np.ndarray, values: np.ndarray, columns: Iterable[str]) -> None:
+        self.open_ms = open_ms
+        self.close = close
+        self.values = values
+        self.columns = list(columns)
+        self.index = {name: j for j, name in enumerate(self.columns)}
+        self.attrs: dict = {}
+
+    @classmethod
+    def from_columns(
+        cls,
+        open_ms: np.ndarray,
+        close: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        drop: Iterable[str] = DROP_COMPACT,
+    ) -> "FeatureMatrix":
+        names = [c for c in columns if c not in drop and c not in _SKIP]
+        values = np.empty((len(open_ms), len(names)), dtype=np.float32)
+        for j, name in enumerate(names):
+            values[:, j] = columns[name]
+        return cls(
+            np.ascontiguousarray(open_ms, dtype=np.int64),
+            np.array(close, dtype=np.float64),
+            values,
+            names,
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, drop: Iterable[str] = DROP_COMPACT) -> "FeatureMatrix":
+        """Compacta a saida de add_indicators (colunas numericas alem do OHLCV)."""
+        open_ms = pd.DatetimeIndex(df["open_time"]).asi8 // 1_000_000
+        cols = {c: df[c].to_numpy(dtype=np.float64) for c in df.columns if c not in _SKIP}
+        out = cls.from_columns(open_ms, df["close"].to_numpy(dtype=np.float64), cols, drop)
+        out.attrs = dict(df.attrs)
+        return out
+
+    def __len__(self) -> int:
+        return len(self.open_ms)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.open_ms.nbytes + self.close.nbytes)
+
+    def get(self, name: str, default=None):
+        """Coluna (view float32); mesma interface de DataFrame.get."""
+        if name == "close":
+            return self.close
+        j = self.index.get(name)
+        return default if j is None else self.values[:, j]
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame sobre a matriz (sem copiar as features), com open_time e close."""
+        df = pd.DataFrame(self.values, columns=self.columns, copy=False)
+        df.insert(0, "open_time", pd.DatetimeIndex(self.open_ms.astype("datetime64[ms]").astype("datetime64[ns]")))
+        df.insert(1, "close", self.close)
+        df.attrs = dict(self.attrs)
+        return df
+
+
+def frame_nbytes(df) -> int:
+    """Bytes das colunas de um frame de features (ou FeatureMatrix)."""
+    if df is None:
+        return 0
+    if isinstance(df, FeatureMatrix):
+        return df.nbytes
+    return int(df.memory_usage(index=True, deep=False).sum())
+
+
+# ultimo scan: bytes de features por simbolo e timeframe
+_BYTES: Dict[str, Dict[str, int]] = {}
+_BYTES_LOCK = threading.Lock()
+
+
+def record_bytes(symbol: str, frames: Dict[str, object]) -> None:
+    with _BYTES_LOCK:
+        _BYTES[symbol] = {tf: frame_nbytes(df) for tf, df in frames.items()}
+
+
+def memory_report(profile: str) -> dict:
+    with _BYTES_LOCK:
+        per_symbol = {s: dict(v, total=sum(v.values())) for s, v in _BYTES.items()}
+    totals = [v["total"] for v in per_symbol.values()]
+    return {
+        "profile": profile,
+        "symbols": len(per_symbol),
+        "bytes_total": int(sum(totals)),
+        "bytes_per_symbol_avg": int(np.mean(totals)) if totals else 0,
+        "per_symbol": per_symbol,
+    }
@@ -0,0 +1,95 @@
+"""
+Painel de features: empilha os candles de N simbolos em arrays (simbolos x
+tempo) e calcula todos os indicadores de feature_kernels numa passada so,
+ao longo do eixo do tempo. Cada simbolo ocupa uma linha a partir da coluna 0
+(o fim e preenchido repetindo a ultima barra); como os indicadores sao
+causais, a linha de um simbolo da o mesmo que add_indicators no frame dele.
+"""
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from .feature_kernels import OHLCV, indicator_arrays
+from .feature_matrix import FeatureMatrix
+from .features import add_indicators
+
+# colunas que o `ta` nao gera em frames curtos (ver feature_kernels)
+_MIN_ROWS = {"atr14": 14, "atr_ratio": 14, "adx14": 28}
+
+
+def _panel_ok(df: pd.DataFrame | None) -> bool:
+    if df is None or df.empty or not all(c in df for c in OHLCV):
+        return False
+    return not df[list(OHLCV)].isna().to_numpy().any()
+
+
+class FeaturePanel:
+    """Indicadores de varios simbolos; frame(simbolo) devolve views sobre o painel."""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]) -> None:
+        self.symbols: List[str] = list(frames)
+        self._frames = frames
+        self._row = {s: i for i, s in enumerate(self.symbols)}
+        self.lengths = np.array([len(frames[s]) for s in self.symbols], dtype=np.int64)
+        width = int(self.lengths.max()) if len(self.lengths) else 0
+        base = np.empty((len(OHLCV), len(self.symbols), width), dtype=np.float64)
+        for i, s in enumerate(self.symbols):
+            n = self.lengths[i]
+            base[:, i, :n] = frames[s][list(OHLCV)].to_numpy(dtype=np.float64).T
+            base[:, i, n:] = base[:, i, n - 1:n]
+        self.base = dict(zip(OHLCV, base))
+        self.columns = indicator_arrays(*base) if width else {}
+
+    def column(self, name: str) -> np.ndarray:
+        """(simbolos, tempo); posicoes alem de lengths[i] sao preenchimento."""
+        return self.base[name] if name in self.base else self.columns[name]
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """Mesmo resultado de add_indicators(frame do simbolo), sem copiar as colunas do painel."""
+        i, src = self._row[symbol], self._frames[symbol]
+        n = int(self.lengths[i])
+        data = {c: (self.base[c][i, :n] if c in self.base else src[c]) for c in src.columns}
+        for name, arr in self.columns.items():
+            if n >= _MIN_ROWS.get(name, 0):
+                data[name] = arr[i, :n]
+        out = pd.DataFrame(data, index=src.index, copy=False)
+        out.attrs = dict(src.attrs)
+        return out
+
+    def matrix(self, symbol: str) -> FeatureMatrix:
+        """Features do simbolo no perfil compacto (float32), direto do painel."""
+        i, src = self._row[symbol], self._frames[symbol]
+        n = int(self.lengths[i])
+        cols = {name: arr[i, :n] for name, arr in self.columns.items() if n >= _MIN_ROWS.get(name, 0)}
+        open_ms = pd.DatetimeIndex(src["open_time"]).asi8 // 1_000_000
+        out = FeatureMatrix.from_columns(open_ms, self.base["close"][i, :n], cols)
+        out.attrs = dict(src.attrs)
+        return out
+
+
+def add_indicators_panel(frames: Dict[str, pd.DataFrame | None], compact: bool = False) -> Dict[str, object]:
+    """
+    add_indicators para varios simbolos de uma vez (compact=True: FeatureMatrix
+    float32). Frames com NaN ou sem OHLCV completo seguem pelo add_indicators
+    normal; None e vazios passam direto.
+    """
+    ok = {s: df for s, df in frames.items() if _panel_ok(df)}
+    panel = FeaturePanel(ok) if ok else None
+    out: Dict[str, object] = {}
+    for symbol, df in frames.items():
+        if symbol in ok:
+            out[symbol] = panel.matrix(symbol) if compact else panel.frame(symbol)
+        elif df is None or df.empty:
+            out[symbol] = df
+        else:
+            df = add_indicators(df)
+            out[symbol] = FeatureMatrix.from_frame(df) if compact else df
+    return out
+
+
+def chunks(symbols: Iterable[str], size: int) -> Iterable[List[str]]:
+    symbols = list(symbols)
+    size = max(1, size)
+    for i in range(0, len(symbols), size):
+        yield symbols[i:i + size]
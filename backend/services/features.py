@@ -4,8 +4,24 @@ from ta.momentum import RSIIndicator
 from ta.trend import EMAIndicator, ADXIndicator
 from ta.volatility import AverageTrueRange, BollingerBands
 
+from .feature_kernels import OHLCV, add_indicators_np
+from .strategies import short_sniper_mask
+from .utils import FEATURES_ENGINE
 
-def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
+
+def add_indicators(df: pd.DataFrame, engine: str | None = None) -> pd.DataFrame:
+    """
+    Indicadores por barra. engine (padrao FEATURES_ENGINE): "ta" ou "numpy"
+    (feature_kernels, mesmas colunas); o numpy cai no `ta` se o frame estiver
+    vazio, faltar coluna OHLCV ou houver NaN.
+    """
+    if (engine or FEATURES_ENGINE) == "numpy" and len(df) and all(c in df for c in OHLCV):
+        if not df[list(OHLCV)].isna().to_numpy().any():
+            return add_indicators_np(df)
+    return _add_indicators_ta(df)
+
+
+def _add_indicators_ta(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df["close"] = df["close"].astype(float)
     df["volume"] = df["volume"].astype(float)
@@ -104,16 +120,10 @@ def rule_short_sniper_row(row) -> int:
     3) Sombra superior relevante (upper_wick >= 0.35) – exaustão
     4) Retorno 15 barras esticado (ret_15 >= 0.12)
     """
-    conds = [
-        row.get("rsi14", 0) >= 72,
-        row.get("vol_z", 0) >= 1.5,
-        row.get("upper_wick", 0) >= 0.35,
-        row.get("ret_15", 0) >= 0.12,
-    ]
-    return int(all(conds))
+    return int(short_sniper_mask(row))
 
 
 def generate_short_signals(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
-    df["short_signal"] = df.apply(rule_short_sniper_row, axis=1)
+    df["short_signal"] = short_sniper_mask(df).astype(int)
     return df
@@ -0,0 +1,278 @@
+"""
+Motor de indicadores incremental: mesmas colunas de features.add_indicators,
+atualizadas em O(1) por barra (janelas fixas de no maximo 50 valores), com
+estado por (simbolo, intervalo).
+
+Segue as definicoes do `ta`/pandas usadas em add_indicators, inclusive os
+detalhes de borda: RSI/EMA via ewm(adjust=False) com min_periods, ATR e ADX
+com zeros antes do aquecimento, rolling com os mesmos min_periods. A barra 0
+de um engine equivale a primeira linha do frame em add_indicators.
+
+Uso:
+    eng = IndicatorEngine()
+    eng.seed(df)                     # historico (open_time + OHLCV)
+    row = eng.update(t, o, h, l, c, v)  # nova barra fechada
+    row = eng.peek(t, o, h, l, c, v)    # barra em formacao, sem alterar o estado
+"""
+import copy
+import math
+import threading
+from collections import deque
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "rsi14", "rsi_slope3", "rsi_z",
+    "ret_1", "ret_5", "ret_15",
+    "vol_ma20", "vol_std20", "vol_z", "vol_ratio",
+    "upper_wick", "lower_wick", "body_norm", "wick_ratio",
+    "ema20", "ema50", "ema200", "ema_dist20", "ema_dist50", "ema200_slope",
+    "bb_high", "bb_low", "bb_bw", "bb_pos",
+    "atr14", "atr_ratio", "adx14",
+]
+
+_NAN = math.nan
+_W = 14  # RSI, ATR e ADX
+
+
+def _ewm(prev: float, x: float, alpha: float) -> float:
+    # mesma conta do ewm(adjust=False) do pandas (inclusive o atalho p/ serie constante)
+    if prev == x:
+        return prev
+    return ((1.0 - alpha) * prev + alpha * x) / ((1.0 - alpha) + alpha)
+
+
+def _mean(values) -> float:
+    return math.fsum(values) / len(values)
+
+
+def _var(values, ddof: int) -> float:
+    n = len(values)
+    if n <= ddof:
+        return _NAN
+    m = _mean(values)
+    return max(0.0, math.fsum((x - m) ** 2 for x in values) / (n - ddof))
+
+
+class IndicatorEngine:
+    def __init__(self) -> None:
+        self.n = 0
+        self.last_open_ms: int | None = None
+        self.last_row: Dict[str, float] | None = None
+        self.prev = None  # (h, l, c) da barra anterior
+        self.closes: deque = deque(maxlen=20)
+        self.vols: deque = deque(maxlen=20)
+        self.rsis: deque = deque(maxlen=50)
+        self.emaup = self.emadn = 0.0
+        self.ema = {20: 0.0, 50: 0.0, 200: 0.0}
+        self.ema200_prev = _NAN
+        # ATR (Wilder, semente = media dos primeiros 14 TR)
+        self.tr_seed = []
+        self.atr = 0.0
+        # ADX (somas de Wilder de TR, +DM, -DM; semente nas barras 1..14)
+        self.trs = self.dip = self.din = 0.0
+        self.dx_seed = []
+        self.adx = 0.0
+
+    # ------------------------------------------------------------------ core
+    def update(self, open_ms: int, o: float, h: float, l: float, c: float, v: float) -> Dict[str, float]:
+        """Aplica uma barra fechada e devolve a linha de indicadores dela."""
+        row = self._step(float(o), float(h), float(l), float(c), float(v))
+        self.last_open_ms = int(open_ms)
+        self.last_row = row
+        return row
+
+    def peek(self, open_ms: int, o: float, h: float, l: float, c: float, v: float) -> Dict[str, float]:
+        """Indicadores de uma barra provisoria, sem alterar o estado."""
+        return copy.deepcopy(self).update(open_ms, o, h, l, c, v)
+
+    def seed(self, df: pd.DataFrame) -> Dict[str, float] | None:
+        """Alimenta o historico (open_time + OHLCV, ordenado); retorna a ultima linha."""
+        if df is None or df.empty:
+            return None
+        t = pd.DatetimeIndex(df["open_time"]).asi8 // 1_000_000
+        cols = df[["open", "high", "low", "close", "volume"]].to_numpy(dtype=np.float64)
+        return self.sync(t, cols.T)
+
+    def sync(self, open_ms: np.ndarray, cols: np.ndarray) -> Dict[str, float] | None:
+        """Aplica as barras (cols (5, n)) posteriores a ultima ja vista."""
+        row = None
+        start = 0
+        if self.last_open_ms is not None:
+            start = int(np.searchsorted(open_ms, self.last_open_ms, side="right"))
+        for i in range(start, len(open_ms)):
+            row = self.update(int(open_ms[i]), *cols[:, i].tolist())
+        return row
+
+    def _step(self, o: float, h: float, l: float, c: float, v: float) -> Dict[str, float]:
+        i = self.n
+        prev = self.prev
+        row: Dict[str, float] = {}
+
+        # RSI 14 (ewm alpha=1/14, min_periods=14); diff da barra 0 conta como 0
+        if prev is None:
+            up = dn = 0.0
+            self.emaup, self.emadn = up, dn
+        else:
+            diff = c - prev[2]
+            up = diff if diff > 0 else 0.0
+            dn = -diff if diff < 0 else 0.0
+            self.emaup = _ewm(self.emaup, up, 1.0 / _W)
+            self.emadn = _ewm(self.emadn, dn, 1.0 / _W)
+        if i + 1 < _W:
+            rsi = _NAN
+        elif self.emadn == 0:
+            rsi = 100.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + self.emaup / self.emadn)
+        row["rsi14"] = rsi
+        row["rsi_slope3"] = rsi - self.rsis[-3] if len(self.rsis) >= 3 else _NAN
+        self.rsis.append(rsi)
+        valid = [x for x in self.rsis if x == x]
+        if len(valid) >= 10:
+            sd = math.sqrt(_var(valid, 1))
+            row["rsi_z"] = (rsi - _mean(valid)) / (sd + 1e-9)
+        else:
+            row["rsi_z"] = _NAN
+
+        # Variacoes
+        closes = self.closes
+        for k in (1, 5, 15):
+            row[f"ret_{k}"] = c / closes[-k] - 1.0 if len(closes) >= k else _NAN
+        closes.append(c)
+
+        # Volume (rolling 20, ddof=1)
+        self.vols.append(v)
+        if len(self.vols) == 20:
+            ma = _mean(self.vols)
+            sd = math.sqrt(_var(self.vols, 1))
+            row["vol_ma20"], row["vol_std20"] = ma, sd
+            row["vol_z"] = (v - ma) / (sd + 1e-9)
+            row["vol_ratio"] = v / (ma + 1e-9)
+        else:
+            row["vol_ma20"] = row["vol_std20"] = row["vol_z"] = row["vol_ratio"] = _NAN
+
+        # Pavios e corpo
+        rng = h - l
+        row["upper_wick"] = (h - max(c, o)) / (rng + 1e-9)
+        row["lower_wick"] = (min(c, o) - l) / (rng + 1e-9)
+        if rng == 0:
+            row["body_norm"] = row["wick_ratio"] = _NAN
+        else:
+            row["body_norm"] = min(5.0, max(-5.0, (c - o) / (rng + 1e-9)))
+            row["wick_ratio"] = min(1.0, max(0.0, (h - c) / (rng + 1e-9)))
+
+        # EMAs (span, adjust=False, min_periods=span)
+        for span in (20, 50, 200):
+            self.ema[span] = c if i == 0 else _ewm(self.ema[span], c, 2.0 / (span + 1))
+            row[f"ema{span}"] = self.ema[span] if i + 1 >= span else _NAN
+        row["ema_dist20"] = (c - row["ema20"]) / (row["ema20"] + 1e-9)
+        row["ema_dist50"] = (c - row["ema50"]) / (row["ema50"] + 1e-9)
+        row["ema200_slope"] = row["ema200"] - self.ema200_prev
+        self.ema200_prev = row["ema200"]
+
+        # Bollinger (20, 2; std ddof=0)
+        if len(closes) == 20:
+            mavg = _mean(closes)
+            sd = math.sqrt(_var(closes, 0))
+            row["bb_high"], row["bb_low"] = mavg + 2.0 * sd, mavg - 2.0 * sd
+            width = abs(row["bb_high"] - row["bb_low"])
+            row["bb_bw"] = width / (c + 1e-9)
+            row["bb_pos"] = (c - row["bb_low"]) / (width + 1e-9)
+        else:
+            row["bb_high"] = row["bb_low"] = row["bb_bw"] = row["bb_pos"] = _NAN
+
+        # ATR 14 (zeros ate a semente, como o ta)
+        tr = rng if prev is None else max(rng, abs(h - prev[2]), abs(l - prev[2]))
+        if i < _W:
+            self.tr_seed.append(tr)
+            if i == _W - 1:
+                self.atr = float(np.mean(self.tr_seed))
+        else:
+            self.atr = (self.atr * (_W - 1) + tr) / float(_W)
+        row["atr14"] = self.atr
+        last5 = list(closes)[-5:]
+        row["atr_ratio"] = self.atr / (_mean(last5) + 1e-9) if len(last5) == 5 else _NAN
+
+        # ADX 14 (mesma sequencia do ta: somas das barras 1..14, DX a partir da 14,
+        # ADX = media dos 14 primeiros DX na barra 27 e Wilder depois; zeros antes)
+        if prev is not None:
+            dm = max(h, prev[2]) - min(l, prev[2])
+            du, dd = h - prev[0], prev[1] - l
+            pos = du if (du > dd and du > 0) else 0.0
+            neg = dd if (dd > du and dd > 0) else 0.0
+            if i <= _W:
+                self.trs += dm
+                self.dip += pos
+                self.din += neg
+            else:
+                self.trs = self.trs - self.trs / float(_W) + dm
+                self.dip = self.dip - self.dip / float(_W) + pos
+                self.din = self.din - self.din / float(_W) + neg
+            if i >= _W:
+                dip = 100 * (self.dip / self.trs) if self.trs != 0 else 0.0
+                din = 100 * (self.din / self.trs) if self.trs != 0 else 0.0
+                dx = 100 * abs((dip - din) / (dip + din)) if dip + din != 0 else 0.0
+                if i < 2 * _W - 1:
+                    self.dx_seed.append(dx)
+                elif i == 2 * _W - 1:
+                    self.dx_seed.append(dx)
+                    self.adx = float(np.mean(self.dx_seed))
+                else:
+                    self.adx = (self.adx * (_W - 1) + dx) / float(_W)
+        row["adx14"] = self.adx
+
+        self.prev = (h, l, c)
+        self.n += 1
+        return row
+
+
+# ---------------------------------------------------------------- registro
+_ENGINES: Dict[Tuple[str, str], IndicatorEngine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(symbol: str, interval: str) -> IndicatorEngine:
+    key = (symbol.upper(), interval)
+    with _ENGINES_LOCK:
+        eng = _ENGINES.get(key)
+        if eng is None:
+            eng = _ENGINES[key] = IndicatorEngine()
+        return eng
+
+
+def reset_engine(symbol: str, interval: str) -> IndicatorEngine:
+    with _ENGINES_LOCK:
+        eng = _ENGINES[(symbol.upper(), interval)] = IndicatorEngine()
+        return eng
+
+
+def compare_with_batch(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Checagem de consistencia: alimenta o engine barra a barra com `df` e compara
+    com add_indicators(df). Retorna o maior erro relativo por coluna (inf se o
+    padrao de NaN diverge).
+    """
+    from .features import add_indicators
+
+    batch = add_indicators(df)
+    eng = IndicatorEngine()
+    t = pd.DatetimeIndex(df["open_time"]).asi8 // 1_000_000
+    cols = df[["open", "high", "low", "close", "volume"]].to_numpy(dtype=np.float64)
+    rows = [eng.update(int(t[i]), *cols[i].tolist()) for i in range(len(df))]
+    stream = pd.DataFrame(rows, columns=COLUMNS)
+    out = {}
+    for col in COLUMNS:
+        if col not in batch:
+            continue
+        a = stream[col].to_numpy(dtype=np.float64)
+        b = batch[col].to_numpy(dtype=np.float64)
+        if not np.array_equal(np.isnan(a), np.isnan(b)):
+            out[col] = math.inf
+            continue
+        ok = ~np.isnan(b)
+        err = np.abs(a[ok] - b[ok]) / np.maximum(1.0, np.abs(b[ok]))
+        out[col] = float(err.max()) if err.size else 0.0
+    return out
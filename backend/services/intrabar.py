@@ -0,0 +1,141 @@
+"""
+Avaliacao intrabar (STREAM_INTRABAR=1): a cada atualizacao do candle 1m em
+formacao, reavalia combine_strategies sobre ele, no maximo uma vez a cada
+INTRABAR_EVAL_SEC por simbolo. Roda numa thread propria; a thread do
+WebSocket so marca o simbolo como pendente.
+"""
+import math
+import threading
+import time
+from typing import Dict, List
+
+from .indicator_engine import get_engine, reset_engine
+from .market_stream import add_listener, get_frame_1m
+from .strategies import combine_strategies
+from .utils import INTRABAR_EVAL_SEC, STREAM_INTRABAR
+
+# historico usado para (re)semear o engine de indicadores
+_LOOKBACK = 400
+_MIN_BARS = 30
+
+_LOCK = threading.Lock()
+# engines sao atualizados por um avaliador de cada vez
+_ENGINE_LOCK = threading.Lock()
+_EVENT = threading.Event()
+_DIRTY: set = set()
+_LAST_EVAL: Dict[str, float] = {}
+_LATEST: Dict[str, dict] = {}
+# regime da ultima avaliacao completa (15m) de cada simbolo
+_REGIMES: Dict[str, str] = {}
+_STARTED = False
+
+
+def set_regime(symbol: str, regime: str) -> None:
+    _REGIMES[symbol.upper()] = regime
+
+
+def _num(value) -> float | None:
+    try:
+        num = float(value)
+    except (TypeError, ValueError):
+        return None
+    return num if math.isfinite(num) else None
+
+
+def _on_update(symbol: str, closed: bool) -> None:
+    with _LOCK:
+        _DIRTY.add(symbol)
+    _EVENT.set()
+
+
+def _last_row(symbol: str, df) -> dict:
+    """
+    Indicadores da ultima barra de `df` via engine incremental: aplica os 1m
+    fechados que faltam (ressemeia se houve buraco) e avalia a barra em formacao
+    sobre uma copia do estado.
+    """
+    provisional = df.attrs.get("provisional", False)
+    t = df["open_time"].array.asi8 // 1_000_000
+    cols = df[["open", "high", "low", "close", "volume"]].to_numpy(dtype="float64").T
+    n_closed = len(t) - 1 if provisional else len(t)
+    with _ENGINE_LOCK:
+        eng = get_engine(symbol, "1m")
+        last = eng.last_open_ms
+        if last is None or last < t[0] - 60_000 or last > t[n_closed - 1]:
+            eng = reset_engine(symbol, "1m")
+        eng.sync(t[:n_closed], cols[:, :n_closed])
+        if provisional:
+            row = eng.peek(int(t[-1]), *cols[:, -1].tolist())
+        else:
+            row = dict(eng.last_row)
+    bar = dict(zip(("open", "high", "low", "close", "volume"), cols[:, -1].tolist()))
+    return {"open_time": df["open_time"].iloc[-1], **bar, **row}
+
+
+def evaluate(symbol: str) -> dict | None:
+    """Regras sobre o ultimo candle do stream, incluindo o que ainda esta em formacao."""
+    symbol = symbol.upper()
+    df = get_frame_1m(symbol, _LOOKBACK, include_open=True)
+    if len(df) < _MIN_BARS:
+        return None
+    provisional = df.attrs.get("provisional", False)
+    last = _last_row(symbol, df)
+    regime = _REGIMES.get(symbol, "CHOP")
+    strat = combine_strategies(last, regime)
+    return {
+        "symbol": symbol,
+        "open_time": int(last["open_time"].value // 10**6),
+        "provisional": bool(provisional),
+        "regime": regime,
+        "strategy": strat.get("strategy", "NONE"),
+        "rule_long": int(strat.get("rule_long", 0)),
+        "rule_short": int(strat.get("rule_short", 0)),
+        "close": float(last["close"]),
+        "rsi14": _num(last.get("rsi14")),
+        "vol_z": _num(last.get("vol_z")),
+        "upper_wick": _num(last.get("upper_wick")),
+        "ret_15": _num(last.get("ret_15")),
+        "evaluated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def _due() -> List[str]:
+    now = time.monotonic()
+    with _LOCK:
+        due = [s for s in _DIRTY if now - _LAST_EVAL.get(s, 0.0) >= INTRABAR_EVAL_SEC]
+        for s in due:
+            _DIRTY.discard(s)
+            _LAST_EVAL[s] = now
+        if not _DIRTY:
+            _EVENT.clear()
+    return due
+
+
+def _worker() -> None:
+    while True:
+        _EVENT.wait()
+        due = _due()
+        if not due:
+            # pendentes ainda dentro da janela de throttle
+            time.sleep(min(0.1, INTRABAR_EVAL_SEC))
+            continue
+        for symbol in due:
+            try:
+                result = evaluate(symbol)
+            except Exception:
+                continue
+            if result is not None:
+                _LATEST[result["symbol"]] = result
+
+
+def start() -> None:
+    global _STARTED
+    if not STREAM_INTRABAR or _STARTED:
+        return
+    add_listener(_on_update)
+    threading.Thread(target=_worker, name="intrabar-eval", daemon=True).start()
+    _STARTED = True
+
+
+def latest() -> List[dict]:
+    return list(_LATEST.values())
@@ -0,0 +1,82 @@
+"""
+Decodificacao de klines direto para colunas NumPy.
+
+Payloads comuns passam pelo JSON (orjson, se instalado) e np.fromiter por
+coluna, preenchendo um bloco (5, n) float64 ja alocado. Listas de listas grandes
+(Binance, >= _CSV_MIN_ROWS) sao reescritas como CSV e lidas pelo parser C do
+pandas num unico bloco, sem criar um objeto Python por campo.
+"""
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # opcional: cai no json da stdlib
+    orjson = None
+
+PRICE_COLS = ["open", "high", "low", "close", "volume"]
+# abaixo disso o custo fixo do read_csv supera o JSON + fromiter (medido em benchmarks/)
+_CSV_MIN_ROWS = 20_000
+# chaves do formato em dicts da BingX v3
+_DICT_KEYS = {"open_time": "time", "open": "open", "high": "high", "low": "low", "close": "close", "volume": "volume"}
+
+
+def loads(content: bytes):
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _frame(open_ms: np.ndarray, cols: np.ndarray) -> pd.DataFrame:
+    """open_ms int64 (n,) + cols float64 (5, n) C-contiguo -> DataFrame sem copiar cols."""
+    if len(open_ms) > 1 and (np.diff(open_ms) < 0).any():
+        order = np.argsort(open_ms, kind="stable")
+        open_ms, cols = open_ms[order], np.ascontiguousarray(cols[:, order])
+    df = pd.DataFrame(cols.T, columns=PRICE_COLS, copy=False)
+    df.insert(0, "open_time", open_ms.astype("datetime64[ms]").astype("datetime64[ns]"))
+    return df
+
+
+def empty_frame() -> pd.DataFrame:
+    return _frame(np.empty(0, dtype=np.int64), np.empty((5, 0), dtype=np.float64))
+
+
+def decode_rows(rows) -> pd.DataFrame:
+    """Lista ja desserializada (listas [t, o, h, l, c, v, ...] ou dicts BingX v3)."""
+    n = len(rows)
+    if n == 0:
+        return empty_frame()
+    cols = np.empty((5, n), dtype=np.float64)
+    if isinstance(rows[0], dict):
+        open_ms = np.fromiter((r[_DICT_KEYS["open_time"]] for r in rows), dtype=np.int64, count=n)
+        for i, col in enumerate(PRICE_COLS):
+            key = _DICT_KEYS[col]
+            cols[i] = np.fromiter((r[key] for r in rows), dtype=np.float64, count=n)
+    else:
+        open_ms = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+        for i in range(5):
+            cols[i] = np.fromiter((r[i + 1] for r in rows), dtype=np.float64, count=n)
+    return _frame(open_ms, cols)
+
+
+def decode_binance(content: bytes) -> pd.DataFrame:
+    """Corpo bruto de /api/v3/klines -> DataFrame (open_time + OHLCV float64)."""
+    body = content.strip()
+    n = body.count(b"[") - 1
+    if n < _CSV_MIN_ROWS or not body.startswith(b"[[") or b"{" in body:
+        return decode_rows(loads(content) if n > 0 else [])
+    csv = body[2:-2].replace(b"],[", b"\n").translate(None, b'" ')
+    try:
+        block = pd.read_csv(
+            io.BytesIO(csv), header=None, usecols=range(6), dtype=np.float64, engine="c"
+        ).to_numpy()
+    except (ValueError, pd.errors.ParserError):
+        block = None
+    if block is None or block.shape != (n, 6):
+        # formato inesperado: caminho generico
+        return decode_rows(loads(content))
+    open_ms = block[:, 0].astype(np.int64)
+    return _frame(open_ms, np.ascontiguousarray(block[:, 1:6].T))
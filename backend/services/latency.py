@@ -0,0 +1,36 @@
+import numpy as np
+
+# limites dos buckets em segundos: 1 ms .. ~60 s em passos de ~20%
+_EDGES = np.geomspace(0.001, 60.0, 61)
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias em buckets logaritmicos. Quando acumula
+    2 * `window` amostras as contagens caem pela metade, entao os quantis
+    acompanham o comportamento recente da exchange.
+    Usado so dentro do loop do coletor (sem lock).
+    """
+
+    def __init__(self, window: int = 500) -> None:
+        self.window = max(1, int(window))
+        self.counts = np.zeros(len(_EDGES) + 1, dtype=np.float64)
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[int(np.searchsorted(_EDGES, seconds))] += 1.0
+        self.total += 1.0
+        if self.total >= 2 * self.window:
+            self.counts *= 0.5
+            self.total *= 0.5
+
+    def quantile(self, q: float) -> float | None:
+        """Limite superior do bucket que contem o quantil q; None sem amostras."""
+        if self.total <= 0:
+            return None
+        idx = int(np.searchsorted(np.cumsum(self.counts), q * self.total))
+        return float(_EDGES[min(idx, len(_EDGES) - 1)])
+
+    def snapshot(self) -> dict:
+        q = {f"p{int(p * 100)}": self.quantile(p) for p in (0.5, 0.95, 0.99)}
+        return {"samples": int(round(self.total)), **{k: round(v, 4) if v is not None else None for k, v in q.items()}}
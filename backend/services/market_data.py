@@ -1,10 +1,11 @@
 from datetime import datetime
 from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
 
-from .collector import get_klines
-from .market_stream import get_cached_1m, start_stream
+from .collector import get_klines, get_klines_many, get_klines_many_async
+from .market_stream import cached_len, get_frame_1m, get_frame_agg, start_stream
 
 _QUALITY_CACHE: Dict[Tuple[str, str], Dict[str, int]] = {}
 
@@ -20,6 +21,12 @@ def _validate_df(df: pd.DataFrame, interval_min: int) -> Dict[str, int]:
     return {"gaps": gaps, "dups": dups}
 
 
+def _validate_ms(open_ms: np.ndarray, interval_min: int) -> Dict[str, int]:
+    # open_time ja ordenado (buffer do stream): checagem direto no int64
+    diffs = np.diff(open_ms)
+    return {"gaps": int((diffs > interval_min * 60_000 * 1.5).sum()), "dups": int((diffs == 0).sum())}
+
+
 def _resample(df: pd.DataFrame, rule: str) -> pd.DataFrame:
     df = df.copy()
     df["open_time"] = pd.to_datetime(df["open_time"])
@@ -32,6 +39,10 @@ def _resample(df: pd.DataFrame, rule: str) -> pd.DataFrame:
         "volume": "sum",
     }
     out = df.resample(rule, label="right", closed="right").agg(agg).dropna()
+    # janela comecando no meio do primeiro bucket: ele sairia parcial rotulado
+    # como barra cheia; descarta (mesmo criterio do BarAggregator)
+    if len(out) and df.index[0] != out.index[0] - pd.Timedelta(rule) + pd.Timedelta(minutes=1):
+        out = out.iloc[1:]
     out = out.reset_index()
     return out
 
@@ -40,10 +51,10 @@ def get_ohlcv(symbol: str, interval: str, limit: int) -> pd.DataFrame:
     symbol = symbol.upper()
     if interval == "1m":
         start_stream()
-        cached = get_cached_1m(symbol.lower(), limit)
-        if cached:
-            df = pd.DataFrame(cached)
-            _QUALITY_CACHE[(symbol, interval)] = _validate_df(df, 1)
+        # stream curto (ex.: logo apos restart): o coletor completa pelo disco + cauda REST
+        if cached_len(symbol) >= limit:
+            df = get_frame_1m(symbol, limit)
+            _QUALITY_CACHE[(symbol, interval)] = _validate_ms(df["open_time"].array.asi8 // 1_000_000, 1)
             return df
 
     df = get_klines(symbol, interval, limit)
@@ -52,15 +63,40 @@ def get_ohlcv(symbol: str, interval: str, limit: int) -> pd.DataFrame:
     return df
 
 
+def prefetch_ohlcv(symbols: List[str], interval: str, limit: int) -> None:
+    """Aquece o cache do coletor num unico lote para os simbolos sem stream."""
+    if interval == "1m":
+        start_stream()
+        symbols = [s for s in symbols if cached_len(s) < limit]
+    if symbols:
+        get_klines_many(symbols, interval, limit)
+
+
+async def prefetch_ohlcv_async(symbols: List[str], interval: str, limit: int) -> None:
+    """prefetch_ohlcv para rotas async: aguarda o lote sem prender uma thread."""
+    if interval == "1m":
+        start_stream()
+        symbols = [s for s in symbols if cached_len(s) < limit]
+    if symbols:
+        await get_klines_many_async(symbols, interval, limit)
+
+
 def get_multi_timeframe(symbol: str, limit_1m: int = 1000) -> Dict[str, pd.DataFrame]:
     df_1m = get_ohlcv(symbol, "1m", limit_1m)
     if df_1m is None or df_1m.empty:
         return {"1m": df_1m, "5m": pd.DataFrame(), "15m": pd.DataFrame()}
-    df_5m = _resample(df_1m, "5min")
-    df_15m = _resample(df_1m, "15min")
-    _QUALITY_CACHE[(symbol, "5m")] = _validate_df(df_5m, 5)
-    _QUALITY_CACHE[(symbol, "15m")] = _validate_df(df_15m, 15)
-    return {"1m": df_1m, "5m": df_5m, "15m": df_15m}
+    # stream: 5m/15m ja mantidos a cada 1m fechado; REST: resample do frame
+    open_ms = pd.DatetimeIndex(df_1m["open_time"]).asi8 // 1_000_000
+    out = {"1m": df_1m}
+    for interval, rule, minutes in (("5m", "5min", 5), ("15m", "15min", 15)):
+        df = get_frame_agg(symbol, interval, int(open_ms[0]), int(open_ms[-1]))
+        if df is None:
+            df = _resample(df_1m, rule)
+            _QUALITY_CACHE[(symbol, interval)] = _validate_df(df, minutes)
+        else:
+            _QUALITY_CACHE[(symbol, interval)] = _validate_ms(df["open_time"].array.asi8 // 1_000_000, minutes)
+        out[interval] = df
+    return out
 
 
 def get_quality(symbol: str, interval: str) -> Dict[str, int]:
@@ -1,19 +1,41 @@
 import asyncio
 import json
 import os
+import random
 import threading
-from collections import defaultdict, deque
-from datetime import datetime, timezone
-from typing import Deque, Dict, List
+import time
+from typing import Callable, Dict, List
 
+import numpy as np
+import pandas as pd
 import websockets
 
+from . import candle_store
+from .aggregate import BarAggregator
+from .collector import get_klines_range, interval_to_ms
+from .ringbuffer import CandleRing
+from .utils import (
+    STREAM_BUFFER_BARS,
+    STREAM_SHARD_SIZE,
+    STREAM_RECONNECT_MAX_SEC,
+    STREAM_INTRABAR,
+    STREAM_AGG_INTERVALS,
+)
 
 BINANCE_WS_URL = "wss://stream.binance.com:9443/stream"
 
 _STREAM_STARTED = False
 _LOCK = threading.Lock()
-_CANDLES_1M: Dict[str, Deque[dict]] = defaultdict(lambda: deque(maxlen=6000))
+# ultimos candles 1m por simbolo em colunas NumPy (escritas sob _LOCK)
+_RINGS: Dict[str, CandleRing] = {}
+# 5m/15m/... mantidos a cada 1m fechado (mesmo lock dos buffers)
+_AGGS: Dict[str, Dict[str, BarAggregator]] = {}
+# por conexao: simbolos, status, taxa de mensagens, lag e reconexoes
+_SHARD_STATS: List[dict] = []
+# chamados com (simbolo, fechado) a cada candle gravado no buffer
+_LISTENERS: List[Callable[[str, bool], None]] = []
+# janela (s) da taxa de mensagens por shard
+_RATE_WINDOW_SEC = 10.0
 
 
 def _symbols() -> List[str]:
@@ -44,35 +66,194 @@ def _symbols() -> List[str]:
     ]
 
 
-def _store_candle(symbol: str, candle: dict) -> None:
+def _ring(symbol: str) -> CandleRing:
+    # chamado sob _LOCK
+    ring = _RINGS.get(symbol)
+    if ring is None:
+        ring = _RINGS[symbol] = CandleRing(STREAM_BUFFER_BARS)
+        _AGGS[symbol] = {
+            iv: BarAggregator(ring, interval_to_ms(iv))
+            for iv in STREAM_AGG_INTERVALS
+            if (interval_to_ms(iv) or 0) > 60_000
+        }
+    return ring
+
+
+def _push(symbol: str, open_ms: int, o: float, h: float, l: float, c: float, v: float, closed: bool = True) -> bool:
+    # chamado sob _LOCK
+    ok = _ring(symbol).push(open_ms, o, h, l, c, v, closed=closed)
+    if ok and closed:
+        for agg in _AGGS[symbol].values():
+            agg.add(open_ms, o, h, l, c, v)
+    return ok
+
+
+def _store_candle(symbol: str, k: dict) -> None:
     with _LOCK:
-        dq = _CANDLES_1M[symbol]
-        if dq and dq[-1]["open_time"] == candle["open_time"]:
-            dq[-1] = candle
-        else:
-            dq.append(candle)
+        _push(
+            symbol,
+            int(k["t"]),
+            float(k["o"]),
+            float(k["h"]),
+            float(k["l"]),
+            float(k["c"]),
+            float(k["v"]),
+            closed=bool(k.get("x")),
+        )
+
+
+def add_listener(fn: Callable[[str, bool], None]) -> None:
+    if fn not in _LISTENERS:
+        _LISTENERS.append(fn)
 
 
-async def _listen() -> None:
-    streams = "/".join([f"{sym}@kline_1m" for sym in _symbols()])
+def _notify(symbol: str, closed: bool) -> None:
+    # roda na thread do WebSocket: listeners devem ser rapidos (so sinalizar)
+    for fn in list(_LISTENERS):
+        try:
+            fn(symbol, closed)
+        except Exception:
+            pass
+
+
+def _persist_candle(symbol: str, k: dict) -> None:
+    try:
+        candle_store.append_arrays(
+            symbol.upper(),
+            "1m",
+            np.array([k["t"]], dtype=np.int64),
+            {
+                "open": np.array([float(k["o"])]),
+                "high": np.array([float(k["h"])]),
+                "low": np.array([float(k["l"])]),
+                "close": np.array([float(k["c"])]),
+                "volume": np.array([float(k["v"])]),
+            },
+            60_000,
+            closed=True,
+        )
+    except Exception:
+        pass
+
+
+def _push_frame(symbol: str, df: pd.DataFrame) -> int:
+    """Candles fechados vindos do REST (gap de reconexao) -> buffer + disco."""
+    if df is None or df.empty:
+        return 0
+    open_ms = df["open_time"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    closed = open_ms + 60_000 <= int(time.time() * 1000)
+    cols = {c: df[c].to_numpy(dtype=np.float64) for c in ("open", "high", "low", "close", "volume")}
+    pushed = 0
+    with _LOCK:
+        if symbol not in _RINGS:
+            return 0
+        for i in np.flatnonzero(closed):
+            pushed += _push(
+                symbol,
+                int(open_ms[i]),
+                cols["open"][i],
+                cols["high"][i],
+                cols["low"][i],
+                cols["close"][i],
+                cols["volume"][i],
+            )
+    try:
+        candle_store.append(symbol.upper(), "1m", df, 60_000)
+    except Exception:
+        pass
+    return pushed
+
+
+async def _backfill_gap(symbols: List[str]) -> int:
+    # so simbolos que ja tem historico no buffer: o resto o coletor completa sob demanda
+    now_ms = int(time.time() * 1000)
+    total = 0
+    for symbol in symbols:
+        with _LOCK:
+            ring = _RINGS.get(symbol)
+            last = ring.last_open_ms(include_open=False) if ring is not None else None
+        if last is None or last + 120_000 > now_ms:
+            continue
+        try:
+            df = await asyncio.to_thread(get_klines_range, symbol.upper(), "1m", last + 60_000, now_ms)
+        except Exception:
+            continue
+        total += _push_frame(symbol, df)
+    return total
+
+
+def _shard_stat(symbols: List[str]) -> dict:
+    return {
+        "symbols": len(symbols),
+        "connected": False,
+        "messages": 0,
+        "msg_per_sec": 0.0,
+        "lag_ms": None,
+        "reconnects": 0,
+        "backfilled": 0,
+        "last_error": None,
+        "_window_ts": time.monotonic(),
+        "_window_n": 0,
+    }
+
+
+def _on_message(st: dict, payload: dict) -> None:
+    st["messages"] += 1
+    st["_window_n"] += 1
+    if "E" in payload:
+        st["lag_ms"] = int(time.time() * 1000) - int(payload["E"])
+    now = time.monotonic()
+    elapsed = now - st["_window_ts"]
+    if elapsed >= _RATE_WINDOW_SEC:
+        st["msg_per_sec"] = round(st["_window_n"] / elapsed, 3)
+        st["_window_ts"], st["_window_n"] = now, 0
+
+
+async def _listen(symbols: List[str], st: dict) -> None:
+    streams = "/".join([f"{sym}@kline_1m" for sym in symbols])
     url = f"{BINANCE_WS_URL}?streams={streams}"
     async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
+        st["connected"] = True
+        # candles fechados durante a queda: REST antes de consumir o que chegou no socket
+        st["backfilled"] += await _backfill_gap(symbols)
         async for msg in ws:
             data = json.loads(msg)
             payload = data.get("data", {})
+            _on_message(st, payload)
             k = payload.get("k", {})
-            if not k or not k.get("x"):
+            closed = bool(k.get("x"))
+            # candle em formacao so entra no modo intrabar (STREAM_INTRABAR)
+            if not k or not (closed or STREAM_INTRABAR):
                 continue
             symbol = payload.get("s", "").lower()
-            candle = {
-                "open_time": datetime.fromtimestamp(k["t"] / 1000, tz=timezone.utc),
-                "open": float(k["o"]),
-                "high": float(k["h"]),
-                "low": float(k["l"]),
-                "close": float(k["c"]),
-                "volume": float(k["v"]),
-            }
-            _store_candle(symbol, candle)
+            _store_candle(symbol, k)
+            if closed:
+                _persist_candle(symbol, k)
+            _notify(symbol, closed)
+
+
+async def _run_shard(symbols: List[str], st: dict) -> None:
+    failures = 0
+    while True:
+        seen = st["messages"]
+        try:
+            await _listen(symbols, st)
+        except Exception as e:
+            st["last_error"] = f"{type(e).__name__}: {e}"[:200]
+        st["connected"] = False
+        st["reconnects"] += 1
+        # conexao que chegou a receber mensagens zera o backoff
+        failures = 0 if st["messages"] > seen else failures + 1
+        delay = min(STREAM_RECONNECT_MAX_SEC, 2 ** failures)
+        await asyncio.sleep(random.uniform(0.5, 1.0) * delay)
+
+
+async def _run_all() -> None:
+    syms = _symbols()
+    size = max(1, STREAM_SHARD_SIZE)
+    shards = [syms[i:i + size] for i in range(0, len(syms), size)]
+    _SHARD_STATS[:] = [_shard_stat(sh) for sh in shards]
+    await asyncio.gather(*[_run_shard(sh, st) for sh, st in zip(shards, _SHARD_STATS)])
 
 
 def start_stream() -> None:
@@ -83,18 +264,81 @@ def start_stream() -> None:
     def runner():
         while True:
             try:
-                asyncio.run(_listen())
+                asyncio.run(_run_all())
             except Exception:
-                continue
+                time.sleep(1.0)
 
     thread = threading.Thread(target=runner, name="binance-ws", daemon=True)
     thread.start()
     _STREAM_STARTED = True
 
 
-def get_cached_1m(symbol: str, limit: int) -> List[dict]:
+def stream_stats() -> List[dict]:
+    return [
+        {"shard": i, **{k: v for k, v in st.items() if not k.startswith("_")}}
+        for i, st in enumerate(list(_SHARD_STATS))
+    ]
+
+
+def cached_len(symbol: str) -> int:
+    """Candles fechados disponiveis no buffer do simbolo."""
+    with _LOCK:
+        ring = _RINGS.get(symbol.lower())
+        return ring.count() if ring is not None else 0
+
+
+def get_frame_1m(symbol: str, limit: int, include_open: bool = False) -> pd.DataFrame:
+    """
+    Ultimos `limit` candles do stream (ou menos) direto sobre o buffer, sem copiar OHLCV
+    (copia se `limit` chega a menos de VIEW_MARGIN barras da capacidade; ver CandleRing).
+    include_open=True inclui o candle em formacao (e copia, ele muda no lugar);
+    df.attrs["provisional"] indica se ele veio.
+    """
+    with _LOCK:
+        ring = _RINGS.get(symbol.lower())
+        if ring is None:
+            return pd.DataFrame(columns=["open_time", "open", "high", "low", "close", "volume"])
+        return ring.frame(limit, include_open)
+
+
+def get_frame_agg(symbol: str, interval: str, start_ms: int, end_ms: int) -> pd.DataFrame | None:
+    """
+    Barras agregadas (ex.: "5m") dos 1m com open_time em [start_ms, end_ms], como
+    market_data._resample; None se o intervalo nao e mantido ou nao cobre a janela.
+    """
     with _LOCK:
-        dq = list(_CANDLES_1M.get(symbol.lower(), []))
-    if not dq:
-        return []
-    return dq[-limit:]
+        agg = _AGGS.get(symbol.lower(), {}).get(interval)
+        return agg.frame(start_ms, end_ms) if agg is not None else None
+
+
+def export_buffers() -> Dict[str, tuple]:
+    """Copia dos candles fechados de cada buffer: {simbolo: (open_ms, cols (5, n))}."""
+    with _LOCK:
+        return {
+            symbol: tuple(np.array(a) for a in ring.view(ring.capacity))
+            for symbol, ring in _RINGS.items()
+            if ring.count()
+        }
+
+
+def import_buffers(data: Dict[str, tuple]) -> int:
+    """Recarrega buffers salvos por export_buffers; barras ja presentes sao ignoradas."""
+    total = 0
+    with _LOCK:
+        for symbol, (open_ms, cols) in data.items():
+            total += _ring(symbol).extend(open_ms, cols)
+            for agg in _AGGS[symbol].values():
+                agg.rebuild()
+    return total
+
+
+def top_up(symbols: List[str]) -> None:
+    """Busca via REST, em background, os candles fechados que faltam apos o ultimo do buffer."""
+    threading.Thread(
+        target=lambda: asyncio.run(_backfill_gap(symbols)), name="stream-top-up", daemon=True
+    ).start()
+
+
+def get_cached_1m(symbol: str, limit: int) -> List[dict]:
+    # formato antigo (lista de dicts); prefira get_frame_1m
+    return get_frame_1m(symbol, limit).to_dict("records")
@@ -0,0 +1,170 @@
+"""
+Inferencia compilada do payload (MODEL_INFERENCE=numpy): os pedacos sklearn
+salvos por train_baseline viram arrays simples e a probabilidade sai de
+poucos matmuls, sem a validacao por chamada do sklearn.
+
+Cada estimador exportado e um dict:
+  scaler: (mean, scale) do StandardScaler, aplicado antes da primeira camada,
+          ou None. Nao e dobrado nos pesos: com |mean|/scale grande (feature
+          quase constante) W / scale e b - mean @ W perdem precisao
+  layers: [(W, b), ...]
+  hidden: ativacao das camadas ocultas (MLP); a saida e sempre logistica
+  calib:  (a, b) da calibracao sigmoid aplicada sobre a probabilidade, ou None
+
+Na LogisticRegression calibrada a calibracao entra sobre o decision_function
+e tambem e dobrada nos pesos: p = expit(-(a * (x @ w + c) + b)) e uma unica
+camada linear. No MLP (sem decision_function) o sklearn calibra sobre
+predict_proba[:, 1], entao (a, b) fica separado.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy.special import expit
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+# tolerancia contra o predict_proba do sklearn para aceitar a exportacao
+MAX_ABS_ERR = 1e-9
+
+
+# ativacoes in-place (o buffer e sempre o resultado novo do matmul)
+_HIDDEN = {
+    "relu": lambda z: np.maximum(z, 0.0, out=z),
+    "tanh": lambda z: np.tanh(z, out=z),
+    "logistic": lambda z: expit(z, out=z),
+    "identity": lambda z: z,
+}
+
+
+def _unwrap(est) -> Tuple[StandardScaler | None, object]:
+    if isinstance(est, Pipeline):
+        steps = [s for _, s in est.steps if s is not None and s != "passthrough"]
+        if len(steps) == 2 and isinstance(steps[0], StandardScaler):
+            return steps[0], steps[1]
+        if len(steps) == 1:
+            return None, steps[0]
+        raise ValueError("pipeline nao suportado")
+    return None, est
+
+
+def _scaler(scaler: StandardScaler | None, k: int) -> Tuple[np.ndarray, np.ndarray] | None:
+    if scaler is None:
+        return None
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(k)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(k)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+def _export_base(est) -> Dict:
+    scaler, clf = _unwrap(est)
+    if len(getattr(clf, "classes_", ())) != 2:
+        raise ValueError("somente classificador binario")
+    if isinstance(clf, LogisticRegression):
+        W, b = clf.coef_.T.astype(np.float64), clf.intercept_.astype(np.float64)
+        return {"scaler": _scaler(scaler, W.shape[0]), "layers": [(W, b)], "hidden": "identity", "calib": None}
+    if isinstance(clf, MLPClassifier):
+        if clf.out_activation_ != "logistic" or clf.activation not in _HIDDEN:
+            raise ValueError("ativacao do MLP nao suportada")
+        layers: List[Tuple[np.ndarray, np.ndarray]] = [
+            (np.asarray(W, dtype=np.float64), np.asarray(b, dtype=np.float64))
+            for W, b in zip(clf.coefs_, clf.intercepts_)
+        ]
+        return {"scaler": _scaler(scaler, layers[0][0].shape[0]), "layers": layers, "hidden": clf.activation, "calib": None}
+    raise ValueError(f"estimador nao suportado: {type(clf).__name__}")
+
+
+def export_estimator(est) -> Dict:
+    """Arrays de um Pipeline (scaler + LR/MLP), calibrado ou nao (sigmoid, cv=prefit)."""
+    if not isinstance(est, CalibratedClassifierCV):
+        return _export_base(est)
+    if est.method != "sigmoid" or len(est.calibrated_classifiers_) != 1:
+        raise ValueError("somente calibracao sigmoid com um unico calibrador")
+    member = est.calibrated_classifiers_[0]
+    out = _export_base(member.estimator)
+    cal = member.calibrators[0]
+    a, b = float(cal.a_), float(cal.b_)
+    if hasattr(member.estimator, "decision_function"):
+        # expit(-(a * z + b)) com z = saida linear: dobra na ultima camada
+        W, c = out["layers"][-1]
+        out["layers"][-1] = (-a * W, -(a * c + b))
+    else:
+        out["calib"] = (a, b)
+    return out
+
+
+def predict_exported(exp: Dict, x: np.ndarray) -> np.ndarray:
+    """Probabilidade da classe positiva para x (n, features) float64."""
+    layers, hidden = exp["layers"], _HIDDEN[exp["hidden"]]
+    z = x
+    # exportacoes antigas nao tem "scaler" (ja dobrado na primeira camada)
+    if exp.get("scaler") is not None:
+        mean, scale = exp["scaler"]
+        z = x - mean
+        z /= scale
+    for W, b in layers[:-1]:
+        z = z @ W
+        z += b
+        z = hidden(z)
+    W, b = layers[-1]
+    z = z @ W
+    z += b
+    p = expit(z[:, 0], out=z[:, 0])
+    if exp["calib"] is not None:
+        a, b = exp["calib"]
+        p *= -a
+        p -= b
+        p = expit(p, out=p)
+    return p
+
+
+def _sample_rows(est, n: int = 256) -> np.ndarray:
+    # linhas em torno da distribuicao de treino (media +- desvios do scaler)
+    scaler, clf = _unwrap(est.calibrated_classifiers_[0].estimator if isinstance(est, CalibratedClassifierCV) else est)
+    k = int(clf.n_features_in_)
+    mean = scaler.mean_ if scaler is not None and scaler.mean_ is not None else np.zeros(k)
+    scale = scaler.scale_ if scaler is not None and scaler.scale_ is not None else np.ones(k)
+    rng = np.random.default_rng(0)
+    return mean + scale * rng.normal(0.0, 2.0, (n, k))
+
+
+def max_abs_error(est, exp: Dict, x: np.ndarray | None = None) -> float:
+    if x is None or len(x) == 0:
+        x = _sample_rows(est)
+    x = np.asarray(x, dtype=np.float64)
+    return float(np.max(np.abs(predict_exported(exp, x) - est.predict_proba(x)[:, 1])))
+
+
+def export_payload(payload: Dict, x: np.ndarray | None = None) -> Dict | None:
+    """
+    Exporta os estimadores que predict_batch usa (calibrador ou modelo, e o
+    neural) e confere contra o sklearn em `x` (ou em linhas sinteticas).
+    None se algum pedaco nao for suportado ou passar de MAX_ABS_ERR.
+    """
+    out: Dict = {"model": None, "neural": None, "max_abs_err": 0.0}
+    model = payload.get("calibrator") if payload.get("calibrator") is not None else payload.get("model")
+    neural = payload.get("calibrator_neural")
+    if neural is None:
+        neural = payload.get("model_neural")
+    for key, est in (("model", model), ("neural", neural)):
+        if est is None:
+            continue
+        try:
+            exp = export_estimator(est)
+            err = max_abs_error(est, exp, x)
+        except Exception as e:
+            logger.warning("model_export: %s nao exportado (%s); inferencia fica no sklearn", key, e)
+            return None
+        if not err <= MAX_ABS_ERR:
+            logger.warning(
+                "model_export: %s rejeitado, erro %.3g > %.0e; inferencia fica no sklearn", key, err, MAX_ABS_ERR
+            )
+            return None
+        out[key] = exp
+        out["max_abs_err"] = max(out["max_abs_err"], err)
+    return out if out["model"] is not None else None
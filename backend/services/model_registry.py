@@ -0,0 +1,231 @@
+"""
+Registro versionado dos modelos treinados (MODEL_REGISTRY_DIR):
+  <versao>.pkl  artefato imutavel (gravado em .tmp e publicado com os.replace)
+  CURRENT       versao ativa, trocada atomicamente
+  PINS.json     {simbolo: versao} fixadas por simbolo
+
+Leitura sem lock: o estado ativo (versao atual, pins e payloads carregados)
+e um dict que nunca e alterado, so substituido; get() apenas le a
+referencia em _STATE. Escritas (publish, activate, pin, rollback) e a
+recarga sao serializadas por _WRITE_LOCK. Uma thread (MODEL_WATCH_SEC)
+detecta trocas de CURRENT/PINS feitas por outro processo.
+
+Sem CURRENT, o payload legado (LEGACY_PATH) e importado como primeira versao.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import joblib
+
+from .model_export import export_payload
+from .utils import MODEL_REGISTRY_DIR, MODEL_WATCH_SEC
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_DIR = MODEL_REGISTRY_DIR
+LEGACY_PATH = "data/models/baseline_logreg.pkl"
+
+_STATE: Dict | None = None
+_WRITE_LOCK = threading.Lock()
+_STARTED = False
+
+
+def _path(name: str) -> str:
+    return os.path.join(REGISTRY_DIR, name)
+
+
+def version_path(version: str) -> str:
+    return _path(f"{version}.pkl")
+
+
+def _atomic_write(name: str, write) -> None:
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    tmp = f"{_path(name)}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        write(fh)
+    os.replace(tmp, _path(name))
+
+
+def list_versions() -> List[str]:
+    """Versoes publicadas, da mais antiga para a mais nova."""
+    try:
+        names = os.listdir(REGISTRY_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(n[:-4] for n in names if n.endswith(".pkl"))
+
+
+def _stamp(name: str):
+    # os.replace troca o inode: (inode, mtime) muda a cada escrita
+    try:
+        st = os.stat(_path(name))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def _read_pointers() -> Tuple[str | None, Dict[str, str]]:
+    try:
+        with open(_path("CURRENT")) as fh:
+            current = fh.read().strip() or None
+    except FileNotFoundError:
+        current = None
+    try:
+        with open(_path("PINS.json")) as fh:
+            pins = dict(json.load(fh))
+    except FileNotFoundError:
+        pins = {}
+    return current, pins
+
+
+def _load(version: str) -> Dict:
+    payload = joblib.load(version_path(version))
+    if "compiled" not in payload:
+        # payload antigo: exporta e confere em linhas sinteticas
+        payload["compiled"] = export_payload(payload)
+    return payload
+
+
+def _store(payload: Dict) -> str:
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S_%f")
+    while os.path.exists(version_path(version)):
+        version += "_1"
+    payload.setdefault("meta", {})["version"] = version
+    _atomic_write(f"{version}.pkl", lambda fh: joblib.dump(payload, fh))
+    return version
+
+
+def _set_current(version: str) -> None:
+    _atomic_write("CURRENT", lambda fh: fh.write(version.encode()))
+
+
+def _set_pins(pins: Dict[str, str]) -> None:
+    _atomic_write("PINS.json", lambda fh: fh.write(json.dumps(pins, sort_keys=True).encode()))
+
+
+def _refresh(force: bool = False) -> None:
+    """Recarrega ponteiros e payloads se mudaram (chamar com _WRITE_LOCK)."""
+    global _STATE
+    stamp = (REGISTRY_DIR, _stamp("CURRENT"), _stamp("PINS.json"))
+    if not force and _STATE is not None and _STATE["stamp"] == stamp:
+        return
+    current, pins = _read_pointers()
+    if current is None and os.path.exists(LEGACY_PATH):
+        current = _store(joblib.load(LEGACY_PATH))
+        _set_current(current)
+        logger.info("model_registry: %s importado como versao %s", LEGACY_PATH, current)
+        stamp = (REGISTRY_DIR, _stamp("CURRENT"), _stamp("PINS.json"))
+    loaded = _STATE["payloads"] if _STATE is not None and _STATE["dir"] == REGISTRY_DIR else {}
+    payloads: Dict[str, Dict] = {}
+    for version in {current, *pins.values()} - {None}:
+        try:
+            payloads[version] = loaded[version] if version in loaded else _load(version)
+        except Exception:
+            logger.exception("model_registry: falha ao carregar versao %s", version)
+    if current is not None and current not in payloads:
+        # CURRENT aponta para algo ilegivel: mantem a versao ativa anterior
+        if _STATE is not None and _STATE["current"] in loaded:
+            current = _STATE["current"]
+            payloads[current] = loaded[current]
+        else:
+            current = None
+    pins = {s: v for s, v in pins.items() if v in payloads}
+    _STATE = {"dir": REGISTRY_DIR, "stamp": stamp, "current": current, "pins": pins, "payloads": payloads}
+
+
+def reload(force: bool = False) -> None:
+    with _WRITE_LOCK:
+        _refresh(force)
+
+
+def get(symbol: str | None = None) -> Tuple[str, Dict]:
+    """(versao, payload) ativo para o simbolo (pin ou CURRENT), sem lock."""
+    state = _STATE
+    if state is None or state["dir"] != REGISTRY_DIR:
+        reload()
+        state = _STATE
+    version = state["pins"].get(symbol.upper(), state["current"]) if symbol else state["current"]
+    if version is None:
+        raise FileNotFoundError("Nenhum modelo no registro.")
+    return version, state["payloads"][version]
+
+
+def publish(payload: Dict, activate: bool = True) -> str:
+    """Grava o payload como nova versao imutavel e (por padrao) a torna CURRENT."""
+    with _WRITE_LOCK:
+        version = _store(payload)
+        if activate:
+            _set_current(version)
+            _refresh()
+    return version
+
+
+def activate(version: str) -> str:
+    with _WRITE_LOCK:
+        if version not in list_versions():
+            raise FileNotFoundError(f"Versao {version} nao encontrada.")
+        _set_current(version)
+        _refresh()
+    return version
+
+
+def rollback(version: str | None = None) -> str:
+    """Ativa `version` ou, sem ela, a versao publicada antes da atual."""
+    if version is None:
+        current, _ = _read_pointers()
+        older = [v for v in list_versions() if current is None or v < current]
+        if not older:
+            raise ValueError("Nao ha versao anterior para rollback.")
+        version = older[-1]
+    return activate(version)
+
+
+def pin(symbol: str, version: str | None) -> Dict[str, str]:
+    """Fixa a versao usada para o simbolo (None remove o pin)."""
+    symbol = symbol.strip().upper()
+    with _WRITE_LOCK:
+        _, pins = _read_pointers()
+        if version is None:
+            pins.pop(symbol, None)
+        elif version not in list_versions():
+            raise FileNotFoundError(f"Versao {version} nao encontrada.")
+        else:
+            pins[symbol] = version
+        _set_pins(pins)
+        _refresh()
+        return dict(_STATE["pins"])
+
+
+def status() -> Dict:
+    if _STATE is None:
+        reload()
+    state = _STATE
+    return {
+        "dir": REGISTRY_DIR,
+        "current": state["current"] if state else None,
+        "pins": dict(state["pins"]) if state else {},
+        "loaded": sorted(state["payloads"]) if state else [],
+        "versions": list_versions(),
+    }
+
+
+def _watch_loop() -> None:
+    while True:
+        time.sleep(MODEL_WATCH_SEC)
+        try:
+            reload()
+        except Exception:
+            logger.exception("model_registry: falha ao recarregar")
+
+
+def start() -> None:
+    global _STARTED
+    if _STARTED or MODEL_WATCH_SEC <= 0:
+        return
+    threading.Thread(target=_watch_loop, name="model-registry-watch", daemon=True).start()
+    _STARTED = True
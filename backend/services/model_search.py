@@ -0,0 +1,176 @@
+"""
+Busca de hiperparametros do train_baseline por validacao cruzada temporal
+(TimeSeriesSplit). Cada tarefa (fold x familia de modelo) roda num pool de
+processos (TRAIN_CV_WORKERS); X/y vao uma vez para .npy temporarios que os
+workers abrem por memmap, entao por tarefa so trafegam fold e parametros.
+
+- LR: caminho de C crescente por fold com warm start (cada C parte dos
+  coeficientes do anterior; converge ao mesmo otimo de um fit do zero).
+- MLP: hidden_layer_sizes x alpha com early_stopping.
+Com 1 worker (ou se o pool falhar) as mesmas tarefas rodam em sequencia.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sklearn import metrics
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+from .utils import TRAIN_CV_WORKERS
+
+logger = logging.getLogger(__name__)
+
+LR_CS = tuple(float(c) for c in np.logspace(-3, 2, 16))
+MLP_HIDDEN = ((16,), (32,), (16, 16), (32, 16))
+MLP_ALPHAS = (1e-4, 1e-3, 1e-2)
+N_SPLITS = 5
+
+# worker: X/y abertos por memmap no initializer
+_DATA: Dict[str, np.ndarray] = {}
+
+
+def lr_pipeline(C: float, warm_start: bool = False) -> Pipeline:
+    return Pipeline(
+        [
+            ("scaler", StandardScaler()),
+            ("lr", LogisticRegression(max_iter=400, class_weight="balanced", C=C, warm_start=warm_start)),
+        ]
+    )
+
+
+def mlp_pipeline(hidden: Tuple[int, ...], alpha: float) -> Pipeline:
+    return Pipeline(
+        [
+            ("scaler", StandardScaler()),
+            (
+                "mlp",
+                MLPClassifier(
+                    hidden_layer_sizes=hidden,
+                    activation="relu",
+                    alpha=alpha,
+                    early_stopping=True,
+                    max_iter=500,
+                    random_state=42,
+                ),
+            ),
+        ]
+    )
+
+
+def _fold(n: int, fold: int, n_splits: int) -> Tuple[int, int]:
+    # folds do TimeSeriesSplit sao contiguos: treino [0, a), validacao [a, b)
+    train_idx, val_idx = list(TimeSeriesSplit(n_splits=n_splits).split(np.empty((n, 1))))[fold]
+    return int(train_idx[-1]) + 1, int(val_idx[-1]) + 1
+
+
+def _run(X: np.ndarray, y: np.ndarray, task: tuple) -> Tuple[List[Tuple[tuple, float]], float]:
+    """((config, auc) por config da tarefa, segundos)."""
+    t0 = time.perf_counter()
+    kind, fold, n_splits, params = task
+    a, b = _fold(len(X), fold, n_splits)
+    Xtr, ytr = np.asarray(X[:a]), np.asarray(y[:a])
+    Xval, yval = np.asarray(X[a:b]), np.asarray(y[a:b])
+    out: List[Tuple[tuple, float]] = []
+    if len(np.unique(ytr)) < 2 or len(np.unique(yval)) < 2:
+        return out, time.perf_counter() - t0
+    if kind == "lr":
+        pipe = lr_pipeline(params[0], warm_start=True)
+        for C in params:
+            pipe.set_params(lr__C=C)
+            pipe.fit(Xtr, ytr)
+            out.append((("lr", C), metrics.roc_auc_score(yval, pipe.predict_proba(Xval)[:, 1])))
+    else:
+        hidden, alphas = params
+        for alpha in alphas:
+            pipe = mlp_pipeline(hidden, alpha).fit(Xtr, ytr)
+            out.append((("mlp", hidden, alpha), metrics.roc_auc_score(yval, pipe.predict_proba(Xval)[:, 1])))
+    return out, time.perf_counter() - t0
+
+
+def _init_worker(x_path: str, y_path: str) -> None:
+    # o paralelismo e entre processos: BLAS com 1 thread por worker
+    threadpool_limits(1)
+    _DATA["X"] = np.load(x_path, mmap_mode="r")
+    _DATA["y"] = np.load(y_path, mmap_mode="r")
+
+
+def _run_shared(task: tuple):
+    return _run(_DATA["X"], _DATA["y"], task)
+
+
+def _run_pool(X: np.ndarray, y: np.ndarray, tasks: List[tuple], workers: int) -> list:
+    with tempfile.TemporaryDirectory(prefix="cv_") as tmp:
+        x_path, y_path = os.path.join(tmp, "X.npy"), os.path.join(tmp, "y.npy")
+        np.save(x_path, np.ascontiguousarray(X, dtype=np.float64))
+        np.save(y_path, np.asarray(y))
+        # spawn: o processo da API tem threads (loop do coletor, locks)
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=(x_path, y_path)) as pool:
+            return list(pool.map(_run_shared, tasks))
+
+
+def _workers(n_tasks: int) -> int:
+    workers = TRAIN_CV_WORKERS if TRAIN_CV_WORKERS > 0 else (os.cpu_count() or 1)
+    return max(1, min(workers, n_tasks))
+
+
+def cv_search(X: np.ndarray, y: np.ndarray, n_splits: int = N_SPLITS) -> Dict:
+    """
+    AUC medio por configuracao nos folds validos (treino e validacao com as
+    duas classes). Retorna a melhor LR ({"C", "cv_auc"}) e o melhor MLP
+    ({"hidden", "alpha", "cv_auc"}); cv_auc None sem fold valido (defaults:
+    C=1.0, MLP (16, 16) com alpha 1e-4). Inclui tamanho do grid, fits,
+    workers e tempos (wall e soma das tarefas).
+    """
+    t0 = time.perf_counter()
+    tasks: List[tuple] = []
+    # tarefas mais pesadas primeiro (MLP e folds maiores) para equilibrar o pool
+    for fold in reversed(range(n_splits)):
+        tasks += [("mlp", fold, n_splits, (hidden, MLP_ALPHAS)) for hidden in reversed(MLP_HIDDEN)]
+        tasks.append(("lr", fold, n_splits, LR_CS))
+    workers = _workers(len(tasks))
+    results = None
+    if workers > 1:
+        try:
+            results = _run_pool(X, y, tasks, workers)
+        except Exception:
+            logger.exception("cv_search: pool de processos falhou, seguindo em sequencia")
+            workers = 1
+    if results is None:
+        results = [_run(X, y, task) for task in tasks]
+
+    aucs: Dict[tuple, List[float]] = {}
+    for scores, _ in results:
+        for config, auc in scores:
+            aucs.setdefault(config, []).append(auc)
+    # mesma ordem do grid; empate fica com a primeira configuracao
+    best_lr: Dict = {"C": 1.0, "cv_auc": None}
+    for C in LR_CS:
+        scores = aucs.get(("lr", C))
+        if scores and (best_lr["cv_auc"] is None or np.nanmean(scores) > best_lr["cv_auc"]):
+            best_lr = {"C": C, "cv_auc": float(np.nanmean(scores))}
+    best_mlp: Dict = {"hidden": (16, 16), "alpha": 1e-4, "cv_auc": None}
+    for hidden in MLP_HIDDEN:
+        for alpha in MLP_ALPHAS:
+            scores = aucs.get(("mlp", hidden, alpha))
+            if scores and (best_mlp["cv_auc"] is None or np.nanmean(scores) > best_mlp["cv_auc"]):
+                best_mlp = {"hidden": hidden, "alpha": alpha, "cv_auc": float(np.nanmean(scores))}
+    return {
+        "lr": best_lr,
+        "mlp": best_mlp,
+        "configs": len(LR_CS) + len(MLP_HIDDEN) * len(MLP_ALPHAS),
+        "fits": n_splits * (len(LR_CS) + len(MLP_HIDDEN) * len(MLP_ALPHAS)),
+        "workers": workers,
+        "wall_sec": time.perf_counter() - t0,
+        "task_sec": float(sum(sec for _, sec in results)),
+    }
@@ -1,41 +1,27 @@
 import os
-import threading
+import time
 from datetime import datetime
 import numpy as np
 import pandas as pd
-import joblib
-from sklearn.linear_model import LogisticRegression
-from sklearn.neural_network import MLPClassifier
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.model_selection import TimeSeriesSplit
 from sklearn.calibration import CalibratedClassifierCV
 from sklearn import metrics
 
-MODEL_PATH = "data/models/baseline_logreg.pkl"
-FEE_SLIPPAGE = float(os.getenv("FEE_SLIPPAGE", "0"))
+from . import model_registry
+from .model_export import export_payload, predict_exported
+from .model_search import cv_search, lr_pipeline, mlp_pipeline
+from .thresholds import best_threshold
+from .utils import MODEL_INFERENCE, THRESHOLD_MIN_SUPPORT, THRESHOLD_OBJECTIVE
 
-_MODEL_CACHE = {"payload": None, "mtime": 0.0}
-_MODEL_LOCK = threading.Lock()
+FEE_SLIPPAGE = float(os.getenv("FEE_SLIPPAGE", "0"))
 
 
-def _load_payload():
-    with _MODEL_LOCK:
-        try:
-            mtime = os.path.getmtime(MODEL_PATH)
-        except FileNotFoundError:
-            raise
-        cached = _MODEL_CACHE.get("payload")
-        cached_mtime = _MODEL_CACHE.get("mtime")
-        if cached is not None and cached_mtime == mtime:
-            return cached
-        payload = joblib.load(MODEL_PATH)
-        _MODEL_CACHE["payload"] = payload
-        _MODEL_CACHE["mtime"] = mtime
-        return payload
+def _load_payload(symbol: str | None = None):
+    """Payload ativo (pin do simbolo ou CURRENT do registro), sem lock."""
+    return model_registry.get(symbol)[1]
 
 
-def build_training_frame(df: pd.DataFrame):
+def build_training_frame(df: pd.DataFrame, with_fwd: bool = False):
+    """(X, y, feats); com with_fwd, tambem o retorno futuro de 5 barras por linha."""
     df = df.dropna().copy()
     # target: prob de queda nas proximas 5 barras
     df["fwd_ret_5"] = df["close"].pct_change(5).shift(-5)
@@ -65,108 +51,73 @@ def build_training_frame(df: pd.DataFrame):
     feats = [f for f in feats if f in df.columns]
     X = df[feats].values
     y = df["y_down"].values
+    if with_fwd:
+        return X, y, feats, df["fwd_ret_5"].values
     return X, y, feats
 
 
-def _tscv_best_c(X, y, Cs=(0.1, 1.0, 3.0), n_splits=5):
-    tscv = TimeSeriesSplit(n_splits=n_splits)
-    best_c, best_auc = None, -1
-    for C in Cs:
-        aucs = []
-        for train_idx, val_idx in tscv.split(X):
-            Xtr, Xval = X[train_idx], X[val_idx]
-            ytr, yval = y[train_idx], y[val_idx]
-            if len(np.unique(ytr)) < 2 or len(np.unique(yval)) < 2:
-                continue
-            pipe = Pipeline(
-                [
-                    ("scaler", StandardScaler()),
-                    ("lr", LogisticRegression(max_iter=400, class_weight="balanced", C=C)),
-                ]
-            )
-            pipe.fit(Xtr, ytr)
-            p = pipe.predict_proba(Xval)[:, 1]
-            aucs.append(metrics.roc_auc_score(yval, p))
-        if len(aucs) and np.nanmean(aucs) > best_auc:
-            best_auc = float(np.nanmean(aucs))
-            best_c = C
-    return best_c or 1.0, best_auc if best_auc is not None else None
-
-
-def _best_threshold(y_true, proba, grid=None):
-    if grid is None:
-        grid = [i / 100 for i in range(35, 80)]  # 0.35..0.79
-    best_thr, best_f1 = 0.5, -1
-    for thr in grid:
-        yhat = (proba >= thr).astype(int)
-        f1 = metrics.f1_score(y_true, yhat, zero_division=0)
-        if f1 > best_f1:
-            best_f1, best_thr = f1, thr
-    return float(best_thr), float(best_f1)
-
-
 def train_baseline(df: pd.DataFrame) -> str:
-    X, y, feats = build_training_frame(df)
+    X, y, feats, fwd = build_training_frame(df, with_fwd=True)
     if len(np.unique(y)) < 2:
         raise ValueError("Target sem variacao para treino.")
 
-    # escolhe C via TSCV
-    best_c, cv_auc = _tscv_best_c(X, y)
+    timings = {}
+    t0 = t = time.perf_counter()
+
+    def lap(stage: str) -> None:
+        nonlocal t
+        now = time.perf_counter()
+        timings[stage] = round(now - t, 3)
+        t = now
+
+    # escolhe C e a arquitetura do MLP via TSCV (pool de processos)
+    search = cv_search(X, y)
+    best_c, cv_auc = search["lr"]["C"], search["lr"]["cv_auc"]
+    lap("cv")
 
     # holdout final para calibracao
     split = int(len(X) * 0.8)
     Xtr, ytr = X[:split], y[:split]
     Xval, yval = X[split:], y[split:]
 
-    base = Pipeline(
-        [
-            ("scaler", StandardScaler()),
-            ("lr", LogisticRegression(max_iter=400, class_weight="balanced", C=best_c)),
-        ]
-    )
+    base = lr_pipeline(best_c)
     base.fit(Xtr, ytr)
 
     calibrator = None
     if len(np.unique(yval)) >= 2:
         calibrator = CalibratedClassifierCV(base, cv="prefit", method="sigmoid")
         calibrator.fit(Xval, yval)
+    lap("fit_lr")
 
     # MLP refiner (pequeno), calibrado no holdout
     mlp_base = None
     mlp_cal = None
     try:
-        mlp_base = Pipeline(
-            [
-                ("scaler", StandardScaler()),
-                (
-                    "mlp",
-                    MLPClassifier(
-                        hidden_layer_sizes=(16, 16),
-                        activation="relu",
-                        max_iter=500,
-                        random_state=42,
-                    ),
-                ),
-            ]
-        )
+        mlp_base = mlp_pipeline(search["mlp"]["hidden"], search["mlp"]["alpha"])
         mlp_base.fit(Xtr, ytr)
         if len(np.unique(yval)) >= 2:
             mlp_cal = CalibratedClassifierCV(mlp_base, cv="prefit", method="sigmoid")
             mlp_cal.fit(Xval, yval)
     except Exception:
         mlp_base, mlp_cal = None, None
+    lap("fit_mlp")
 
     proba_val = (
         calibrator.predict_proba(Xval)[:, 1]
         if calibrator is not None
         else base.predict_proba(Xval)[:, 1]
     )
-    thr_best, f1_best = _best_threshold(yval, proba_val)
+    # varredura por ordenacao sobre todos os pontos de corte do holdout
+    choice = best_threshold(
+        yval, proba_val, THRESHOLD_OBJECTIVE, fwd[split:], FEE_SLIPPAGE, THRESHOLD_MIN_SUPPORT
+    )
+    thr_best, f1_best = choice["threshold"], choice["f1"]
     try:
         auc_val = metrics.roc_auc_score(yval, proba_val)
         pr_val = metrics.average_precision_score(yval, proba_val)
     except Exception:
         auc_val, pr_val = None, None
+    lap("threshold")
 
     payload = {
         "model": base,
@@ -183,80 +134,156 @@ def train_baseline(df: pd.DataFrame) -> str:
             "f1_short": f1_best,
             "timestamp": datetime.utcnow().isoformat(),
             "model_type": "hybrid" if mlp_base is not None else "logreg",
+            "mlp": {"hidden": list(search["mlp"]["hidden"]), "alpha": search["mlp"]["alpha"], "cv_auc": search["mlp"]["cv_auc"]},
+            "search": {k: search[k] for k in ("configs", "fits", "workers")},
+            "threshold_objective": {k: v for k, v in choice.items() if k != "curve"},
+            "threshold_curve": choice["curve"],
+            "timings": timings,
         },
         "weights": {"model": 0.7, "neural": 0.3},
     }
-    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    joblib.dump(payload, MODEL_PATH)
-    with _MODEL_LOCK:
-        _MODEL_CACHE["payload"] = payload
-        _MODEL_CACHE["mtime"] = os.path.getmtime(MODEL_PATH)
-    return MODEL_PATH
+    # arrays para inferencia NumPy, conferidos contra o sklearn no holdout
+    payload["compiled"] = export_payload(payload, Xval)
+    lap("export")
+    timings["cv_task_sec"] = round(search["task_sec"], 3)
+    timings["total"] = round(time.perf_counter() - t0, 3)
+    # nova versao imutavel no registro, ativada atomicamente
+    version = model_registry.publish(payload)
+    return model_registry.version_path(version)
+
+
+def _design_matrix(feats, X) -> np.ndarray:
+    """
+    (n, features) na ordem do payload a partir de ndarray (ja ordenado), frame
+    de features (DataFrame/FeatureMatrix) ou linha unica (dict). Feature
+    ausente vale 0.0, como no caminho por linha.
+    """
+    if isinstance(X, dict):
+        return np.array([[X.get(f, 0.0) for f in feats]], dtype=np.float64)
+    if hasattr(X, "get"):
+        n = len(X)
+        cols = [np.asarray(X.get(f, np.zeros(n)), dtype=np.float64) for f in feats]
+        return np.column_stack(cols) if cols else np.empty((n, 0))
+    X = np.asarray(X, dtype=np.float64)
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+
+def _proba(est, x: np.ndarray) -> np.ndarray:
+    return est.predict_proba(x)[:, 1]
+
+
+def _payload_weights(payload, default_model: float = 0.7, default_neural: float = 0.3) -> tuple[float, float]:
+    w = payload.get("weights") or {}
+    wm = float(w.get("model", default_model))
+    wn = float(w.get("neural", default_neural))
+    s = wm + wn
+    if s <= 0:
+        return default_model, default_neural
+    return wm / s, wn / s
 
 
-def _predict(payload, x: np.ndarray) -> tuple[float, float | None]:
-    if payload.get("calibrator") is not None:
-        p_model = float(payload["calibrator"].predict_proba(x)[0][1])
+def _score(payload, x: np.ndarray) -> dict:
+    n = len(x)
+    ok = np.isfinite(x).all(axis=1)
+    compiled = payload.get("compiled") if MODEL_INFERENCE == "numpy" else None
+    if compiled is not None:
+        score, est, neural = predict_exported, compiled["model"], compiled["neural"]
     else:
-        p_model = float(payload["model"].predict_proba(x)[0][1])
-
+        score = _proba
+        est = payload.get("calibrator") if payload.get("calibrator") is not None else payload["model"]
+        neural = payload.get("calibrator_neural")
+        if neural is None:
+            neural = payload.get("model_neural")
+    p_model = np.full(n, np.nan)
     p_neural = None
-    if payload.get("calibrator_neural") is not None:
-        try:
-            p_neural = float(payload["calibrator_neural"].predict_proba(x)[0][1])
-        except Exception:
-            p_neural = None
-    elif payload.get("model_neural") is not None:
-        try:
-            p_neural = float(payload["model_neural"].predict_proba(x)[0][1])
-        except Exception:
-            p_neural = None
-    return p_model, p_neural
-
-
-def predict_proba_down(df_row: dict) -> float:
-    payload = _load_payload()
-    feats = payload["features"]
-    x = np.array([[df_row.get(f, 0.0) for f in feats]])
-    p_model, _ = _predict(payload, x)
-    return p_model
-
-
-def predict_proba_both(df_row: dict) -> dict:
-    payload = _load_payload()
-    feats = payload["features"]
-    x = np.array([[df_row.get(f, 0.0) for f in feats]])
-    p_model, p_neural = _predict(payload, x)
-    return {"model": p_model, "neural": p_neural}
-
-
-def get_weights(default_model: float = 0.7, default_neural: float = 0.3) -> tuple[float, float]:
+    if ok.any():
+        xs = x if ok.all() else x[ok]
+        p_model[ok] = score(est, xs)
+        if neural is not None:
+            try:
+                p_neural = np.full(n, np.nan)
+                p_neural[ok] = score(neural, xs)
+            except Exception:
+                p_neural = None
+    wm, wn = _payload_weights(payload)
+    blend = wm * p_model + wn * (p_neural if p_neural is not None else p_model)
+    return {"model": p_model, "neural": p_neural, "blend": blend, "weights": (wm, wn)}
+
+
+def predict_batch(X, symbol=None) -> dict:
+    """
+    Probabilidades de queda para n linhas numa passada so (um predict_proba
+    por estimador, ou os arrays de model_export com MODEL_INFERENCE=numpy).
+    Retorna arrays (n,): "model", "neural" (None sem rede), "blend" (wm *
+    model + wn * neural, com neural = model sem rede), "weights" e "version".
+    Linhas com NaN/inf saem NaN em vez de derrubar o lote.
+
+    `symbol` escolhe a versao do registro (pin do simbolo ou CURRENT): um
+    simbolo para todas as linhas ou um por linha. Com versoes diferentes, as
+    linhas sao pontuadas por grupo e "weights"/"version" viram um por linha
+    (linha sem rede no grupo tem neural = model).
+    """
+    if symbol is None or isinstance(symbol, str):
+        version, payload = model_registry.get(symbol)
+        return dict(_score(payload, _design_matrix(payload["features"], X)), version=version)
+    resolved = [model_registry.get(s) for s in symbol]
+    versions = np.array([v for v, _ in resolved], dtype=object)
+    groups = dict(resolved)
+    if len(groups) == 1:
+        version, payload = next(iter(groups.items()))
+        return dict(_score(payload, _design_matrix(payload["features"], X)), version=version)
+    n = len(versions)
+    out = {k: np.full(n, np.nan) for k in ("model", "neural", "blend", "wm", "wn")}
+    has_neural = False
+    for version, payload in groups.items():
+        rows = np.flatnonzero(versions == version)
+        res = _score(payload, _design_matrix(payload["features"], X)[rows])
+        has_neural = has_neural or res["neural"] is not None
+        out["model"][rows] = res["model"]
+        out["neural"][rows] = res["neural"] if res["neural"] is not None else res["model"]
+        out["blend"][rows] = res["blend"]
+        out["wm"][rows], out["wn"][rows] = res["weights"]
+    return {
+        "model": out["model"],
+        "neural": out["neural"] if has_neural else None,
+        "blend": out["blend"],
+        "weights": (out["wm"], out["wn"]),
+        "version": versions.tolist(),
+    }
+
+
+def predict_proba_down(df_row: dict, symbol: str | None = None) -> float:
+    return float(predict_batch(df_row, symbol)["model"][0])
+
+
+def predict_proba_both(df_row: dict, symbol: str | None = None) -> dict:
+    out = predict_batch(df_row, symbol)
+    p_neural = out["neural"]
+    return {"model": float(out["model"][0]), "neural": None if p_neural is None else float(p_neural[0])}
+
+
+def get_weights(default_model: float = 0.7, default_neural: float = 0.3, symbol: str | None = None) -> tuple[float, float]:
     try:
-        payload = _load_payload()
-        w = payload.get("weights") or {}
-        wm = float(w.get("model", default_model))
-        wn = float(w.get("neural", default_neural))
-        s = wm + wn
-        if s <= 0:
-            return default_model, default_neural
-        return wm / s, wn / s
+        return _payload_weights(_load_payload(symbol), default_model, default_neural)
     except Exception:
         return default_model, default_neural
 
 
-def get_model_info():
-    payload = _load_payload()
+def get_model_info(symbol: str | None = None):
+    version, payload = model_registry.get(symbol)
     return {
+        "version": version,
         "threshold": payload.get("threshold"),
         "features": payload.get("features", []),
         "meta": payload.get("meta", {}),
         "has_calibrator": payload.get("calibrator") is not None,
+        "inference": "numpy" if MODEL_INFERENCE == "numpy" and payload.get("compiled") is not None else "sklearn",
     }
 
 
-def get_threshold(default: float = 0.55) -> float:
+def get_threshold(default: float = 0.55, symbol: str | None = None) -> float:
     try:
-        info = get_model_info()
+        info = get_model_info(symbol)
         thr = info.get("threshold")
         return float(thr) if thr is not None else float(default)
     except Exception:
@@ -77,3 +77,22 @@ def get_model(symbol: str) -> OnlineModel:
     if key not in _MODELS:
         _MODELS[key] = OnlineModel()
     return _MODELS[key]
+
+
+def find_model(symbol: str) -> OnlineModel | None:
+    """Modelo do simbolo, sem criar um novo."""
+    return _MODELS.get(symbol.upper())
+
+
+def export_models() -> Dict[str, OnlineModel]:
+    return dict(_MODELS)
+
+
+def import_models(models: Dict[str, OnlineModel]) -> int:
+    loaded = 0
+    for key, model in models.items():
+        # modelos ja criados nesta execucao prevalecem
+        if isinstance(model, OnlineModel) and key not in _MODELS:
+            _MODELS[key] = model
+            loaded += 1
+    return loaded
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Orcamento de peso por exchange (ex.: 6000/min na Binance).
+    Usado so dentro do loop do coletor, por isso dispensa lock
+    (vale tambem para o CircuitBreaker abaixo).
+    """
+
+    def __init__(self, capacity: float, refill_per_sec: float) -> None:
+        self.capacity = float(capacity)
+        self.rate = float(refill_per_sec)
+        self.tokens = float(capacity)
+        self._ts = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._ts) * self.rate)
+        self._ts = now
+
+    async def acquire(self, weight: float = 1.0) -> None:
+        weight = min(float(weight), self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= weight:
+                self.tokens -= weight
+                return
+            await asyncio.sleep((weight - self.tokens) / self.rate)
+
+    def sync_used(self, used: float) -> None:
+        # peso ja consumido segundo a exchange (ex.: X-MBX-USED-WEIGHT-1M)
+        self._refill()
+        self.tokens = min(self.tokens, max(0.0, self.capacity - float(used)))
+
+    def pause(self, seconds: float) -> None:
+        # 429/418 com Retry-After: zera o saldo pelo tempo pedido
+        self._refill()
+        self.tokens = -float(seconds) * self.rate
+
+    def paused_for(self) -> float:
+        # segundos restantes de um pause(); so ele deixa o saldo negativo
+        self._refill()
+        return max(0.0, -self.tokens / self.rate)
+
+    def state(self) -> dict:
+        self._refill()
+        return {"capacity": self.capacity, "tokens": round(self.tokens, 2)}
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class RateLimitedError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Abre apos `threshold` falhas seguidas e rejeita chamadas por `cooloff` s;
+    depois deixa uma chamada de teste passar (half-open): sucesso fecha,
+    falha reabre.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, cooloff: float = 30.0) -> None:
+        self.name = name
+        self.threshold = max(1, int(threshold))
+        self.cooloff = float(cooloff)
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.cooloff:
+            return False
+        self._probing = True
+        return True
+
+    def check(self) -> None:
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name}: circuito aberto")
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def abort(self) -> None:
+        # chamada de teste cancelada sem resultado: libera outra tentativa
+        self._probing = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def state(self) -> dict:
+        if self.opened_at is None:
+            status = "closed"
+        elif self._probing or time.monotonic() - self.opened_at >= self.cooloff:
+            status = "half_open"
+        else:
+            status = "open"
+        return {"state": status, "failures": self.failures}
@@ -6,7 +6,8 @@ import numpy as np
 import joblib
 import psycopg2
 
-from .collector import get_klines
+from . import singleflight
+from .collector import get_klines_many
 from .utils import REGIME_SNAPSHOT_TTL_SEC
 
 CG = os.getenv("COINGECKO_BASE", "https://api.coingecko.com/api/v3")
@@ -18,6 +19,8 @@ FUNDING_CACHE_TTL_SEC = int(os.getenv("REGIME_FUNDING_CACHE_TTL_SEC", "180"))
 _MK_CACHE = {"ts": 0.0, "data": None}
 _FUND_CACHE = {"ts": 0.0, "data": None}
 _REGIME_CACHE = {"ts": 0.0, "snap": None}
+# threads que perdem o cache ao mesmo tempo esperam um unico refresh
+_FLIGHT = singleflight.group("regime")
 
 
 def _cg_global() -> dict:
@@ -39,9 +42,10 @@ def _alts_breadth() -> float:
     if not basket:
         return 0.0
     above = 0
+    frames = get_klines_many(basket, "1d", 60)
     for s in basket:
         try:
-            df = get_klines(s.strip(), "1d", 60)
+            df = frames[s.strip().upper()]
             c = df["close"].astype(float)
             ema = c.ewm(span=20).mean()
             if len(c) and c.iloc[-1] > float(ema.iloc[-1]):
@@ -155,9 +159,13 @@ def _get_market_metrics_cached() -> dict:
     ts = _MK_CACHE.get("ts", 0.0)
     if data is not None and (now - ts) < CACHE_TTL_SEC:
         return data
+    return _FLIGHT.do("market_metrics", _refresh_market_metrics)
+
+
+def _refresh_market_metrics() -> dict:
     mk = _compute_total3_and_dominance_deltas()
     _MK_CACHE["data"] = mk
-    _MK_CACHE["ts"] = now
+    _MK_CACHE["ts"] = time.time()
     return mk
 
 
@@ -308,9 +316,13 @@ def get_regime_snapshot_cached(symbol_btc: str = "BTCUSDT") -> dict:
     ts = _REGIME_CACHE.get("ts", 0.0)
     if cached is not None and (now - ts) < REGIME_SNAPSHOT_TTL_SEC:
         return cached
+    return _FLIGHT.do(("snapshot", symbol_btc), lambda: _refresh_regime_snapshot(symbol_btc))
+
+
+def _refresh_regime_snapshot(symbol_btc: str) -> dict:
     snap = compute_regime_snapshot(symbol_btc)
     _REGIME_CACHE["snap"] = snap
-    _REGIME_CACHE["ts"] = now
+    _REGIME_CACHE["ts"] = time.time()
     return snap
 
 
@@ -351,7 +363,10 @@ def _basket_funding_and_oi() -> dict:
     ts = _FUND_CACHE.get("ts", 0.0)
     if data is not None and (now - ts) < FUNDING_CACHE_TTL_SEC:
         return data
+    return _FLIGHT.do("funding_oi", _refresh_funding_and_oi)
+
 
+def _refresh_funding_and_oi() -> dict:
     basket = os.getenv(
         "REGIME_ALT_BASKET", "NEARUSDT,SOLUSDT,AVAXUSDT,RNDRUSDT,FETUSDT"
     ).split(",")
@@ -373,7 +388,7 @@ def _basket_funding_and_oi() -> dict:
     oi_mean = float(np.mean(oi_deltas)) if oi_deltas else 0.0
     out = {"funding_mean_pct": round(f_mean_pct, 4), "oi_delta7_mean": round(oi_mean, 3)}
     _FUND_CACHE["data"] = out
-    _FUND_CACHE["ts"] = now
+    _FUND_CACHE["ts"] = time.time()
     return out
 
 def _ensure_regime_objects(conn, create_mv: bool = False):
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+PRICE_COLS = ["open", "high", "low", "close", "volume"]
+# frame() so devolve fatia sem copia se sobram ao menos VIEW_MARGIN barras de
+# folga no buffer (4h de 1m); mais perto da capacidade, copia
+VIEW_MARGIN = 240
+
+
+def to_frame(t: np.ndarray, cols: np.ndarray) -> pd.DataFrame:
+    """open_ms (n,) + cols (5, n) -> DataFrame com open_time UTC, sem copiar OHLCV."""
+    df = pd.DataFrame(cols.T, columns=PRICE_COLS, copy=False)
+    # conversao direta ms -> ns (pd.to_datetime com unit custa ~10x mais)
+    open_time = pd.DatetimeIndex(t.astype("datetime64[ms]").astype("datetime64[ns]")).tz_localize("UTC")
+    df.insert(0, "open_time", open_time)
+    return df
+
+
+class CandleRing:
+    """
+    Buffer circular de capacidade fixa: open_time int64 (epoch ms) + OHLCV
+    float64 em colunas. Cada barra e gravada em duas posicoes (i e i + capacity),
+    entao as ultimas n barras sao sempre uma fatia contigua, sem copia.
+
+    A ultima barra pode ser provisoria (candle em formacao, modo intrabar):
+    fica fora das leituras por padrao e e sobrescrita ate fechar.
+
+    Nao tem lock proprio: escritas ficam sob o lock de quem e dono do buffer.
+    Uma fatia de view() continua valida ate o buffer avancar (capacity - n)
+    barras; so a ultima barra pode mudar no lugar (sobrescrita do mesmo
+    open_time). Com n == capacity a proxima barra ja sobrescreve a linha 0,
+    entao view() so serve para quem consome sob o lock; frame(), que sai do
+    lock, copia quando a folga e menor que VIEW_MARGIN barras ou quando inclui
+    a barra provisoria.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, int(capacity))
+        self._t = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._cols = np.zeros((len(PRICE_COLS), 2 * self.capacity), dtype=np.float64)
+        self._slot = -1  # posicao (0..capacity-1) da ultima barra
+        self._count = 0
+        self.provisional = False  # ultima barra ainda em formacao
+
+    def __len__(self) -> int:
+        return self._count
+
+    def count(self, include_open: bool = False) -> int:
+        return self._count - int(self.provisional and not include_open)
+
+    def last_open_ms(self, include_open: bool = True) -> int | None:
+        n = self.count(include_open)
+        if n == 0:
+            return None
+        return int(self._t[self._slot + self.capacity - (self._count - n)])
+
+    def push(
+        self, open_ms: int, o: float, h: float, l: float, c: float, v: float, closed: bool = True
+    ) -> bool:
+        """Adiciona a barra ou sobrescreve a ultima (mesmo open_time). Ignora barras antigas."""
+        last = self.last_open_ms()
+        if last is not None and open_ms < last:
+            return False
+        if last is not None and open_ms == last and not closed and not self.provisional:
+            # atualizacao atrasada de um candle que ja fechou
+            return False
+        if last is None or open_ms > last:
+            self._slot = (self._slot + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+        for i in (self._slot, self._slot + self.capacity):
+            self._t[i] = open_ms
+            self._cols[:, i] = (o, h, l, c, v)
+        self.provisional = not closed
+        return True
+
+    def extend(self, open_ms: np.ndarray, cols: np.ndarray) -> int:
+        """Acrescenta em bloco barras fechadas (open_ms crescente, cols (5, n)) posteriores a ultima."""
+        open_ms = np.asarray(open_ms, dtype=np.int64)
+        last = self.last_open_ms(include_open=False)
+        keep = np.flatnonzero(open_ms > last) if last is not None else np.arange(len(open_ms))
+        keep = keep[-self.capacity:]
+        if len(keep) == 0:
+            return 0
+        start = self._slot + 1
+        if self.provisional and open_ms[keep[0]] == self._t[self._slot]:
+            # a barra provisoria fecha com os valores recebidos
+            start = self._slot
+        idx = (start + np.arange(len(keep))) % self.capacity
+        for base in (idx, idx + self.capacity):
+            self._t[base] = open_ms[keep]
+            self._cols[:, base] = np.asarray(cols, dtype=np.float64)[:, keep]
+        self._count = min(self._count + len(keep) - (self._slot + 1 - start), self.capacity)
+        self._slot = int(idx[-1])
+        self.provisional = False
+        return int(len(keep))
+
+    def view(self, n: int, include_open: bool = False):
+        """(open_ms (n,), cols (5, n)) das ultimas n barras, somente leitura e sem copia."""
+        total = self.count(include_open)
+        n = max(0, min(int(n), total))
+        hi = self._slot + self.capacity + 1 - (self._count - total)
+        t = self._t[hi - n:hi]
+        cols = self._cols[:, hi - n:hi]
+        t.flags.writeable = False
+        cols.flags.writeable = False
+        return t, cols
+
+    def frame(self, n: int, include_open: bool = False) -> pd.DataFrame:
+        """
+        Ultimas n barras como DataFrame (open_time UTC). Chamar sob o lock do dono:
+        sem copia (OHLCV sobre as colunas do buffer) enquanto n <= capacity -
+        VIEW_MARGIN, valido por VIEW_MARGIN barras novas; acima disso, copia.
+        Com a barra provisoria incluida tambem copia: ela e regravada no lugar
+        a cada tick e seria lida pela metade fora do lock.
+        """
+        provisional = bool(include_open and self.provisional)
+        t, cols = self.view(n, include_open)
+        if provisional or len(t) > self.capacity - VIEW_MARGIN:
+            t, cols = t.copy(), cols.copy()
+        df = to_frame(t, cols)
+        df.attrs["provisional"] = provisional
+        return df
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class _Flight:
+    __slots__ = ("task", "refs")
+
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.refs = 0  # chamadores aguardando a task
+
+
+class SingleFlight:
+    """
+    Coalesce chamadas concorrentes com a mesma chave: a primeira executa,
+    as demais esperam e recebem o mesmo resultado (ou a mesma excecao).
+    `do` serve threads (pool do FastAPI); `do_async`, corrotinas de um loop.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._futures: Dict[Hashable, _Flight] = {}
+        self._stats: Dict[Hashable, Dict[str, int]] = {}
+
+    def _stat(self, key: Hashable) -> Dict[str, int]:
+        st = self._stats.get(key)
+        if st is None:
+            st = self._stats[key] = {"calls": 0, "coalesced": 0, "waiters": 0}
+        return st
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            st = self._stat(key)
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                st["calls"] += 1
+            else:
+                st["coalesced"] += 1
+                st["waiters"] += 1
+        if not leader:
+            call.event.wait()
+            with self._lock:
+                st["waiters"] -= 1
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            st = self._stat(key)
+            flight = self._futures.get(key)
+            leader = flight is None
+            if leader:
+                # a chamada roda como task propria: sobrevive ao cancelamento de quem a disparou
+                flight = self._futures[key] = _Flight(asyncio.ensure_future(fn()))
+                flight.task.add_done_callback(lambda task: self._landed(key, flight))
+                st["calls"] += 1
+            else:
+                st["coalesced"] += 1
+                st["waiters"] += 1
+            flight.refs += 1
+        try:
+            # shield: cancelar um chamador (lider ou nao) nao derruba os demais
+            return await asyncio.shield(flight.task)
+        finally:
+            with self._lock:
+                flight.refs -= 1
+                if not leader:
+                    st["waiters"] -= 1
+                orphan = flight.refs == 0 and not flight.task.done()
+                if orphan and self._futures.get(key) is flight:
+                    # quem chegar depois dispara uma chamada nova
+                    del self._futures[key]
+            if orphan:
+                # todos desistiram: ninguem mais quer o resultado
+                flight.task.cancel()
+
+    def _landed(self, key: Hashable, flight: "_Flight") -> None:
+        with self._lock:
+            if self._futures.get(key) is flight:
+                del self._futures[key]
+        if not flight.task.cancelled():
+            # evita "exception was never retrieved" quando ninguem esperava
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {_key_str(k): dict(v) for k, v in self._stats.items()}
+
+
+def _key_str(key: Hashable) -> str:
+    if isinstance(key, tuple):
+        return ":".join(str(k) for k in key)
+    return str(key)
+
+
+_GROUPS: Dict[str, SingleFlight] = {}
+_GROUPS_LOCK = threading.Lock()
+
+
+def group(name: str) -> SingleFlight:
+    with _GROUPS_LOCK:
+        sf = _GROUPS.get(name)
+        if sf is None:
+            sf = _GROUPS[name] = SingleFlight(name)
+        return sf
+
+
+def snapshot() -> Dict[str, Dict[str, Dict[str, int]]]:
+    with _GROUPS_LOCK:
+        groups = list(_GROUPS.values())
+    return {g.name: g.stats() for g in groups}
@@ -1,49 +1,89 @@
-from typing import Dict
+"""
+Regras de entrada. As mascaras (`*_mask`) aceitam um DataFrame de
+indicadores (uma posicao por barra) ou uma unica linha (dict/Series) e
+retornam arrays booleanos; as funcoes por linha sao atalhos sobre elas.
+Coluna ausente usa o mesmo default de antes e NaN nunca dispara regra.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# prioridade = ordem (a primeira que dispara vence)
+STRATEGIES = ["NONE", "SHORT_SNIPER", "LONG_DIP", "TREND_PULLBACK"]
+
+
+def _col(data, name: str, default: float) -> np.ndarray:
+    return np.asarray(data.get(name, default), dtype=np.float64)
+
+
+def short_sniper_mask(data) -> np.ndarray:
+    return (
+        (_col(data, "rsi14", 0) >= 72)
+        & (_col(data, "vol_z", 0) >= 1.5)
+        & (_col(data, "upper_wick", 0) >= 0.35)
+        & (_col(data, "ret_15", 0) >= 0.12)
+    )
+
+
+def long_dip_mask(data) -> np.ndarray:
+    return (
+        (_col(data, "rsi14", 100) <= 28)
+        & (_col(data, "ret_15", 0) <= -0.08)
+        & (_col(data, "vol_z", 0) >= 1.2)
+        & (_col(data, "lower_wick", 0) >= 0.30)
+    )
+
+
+def trend_pullback_masks(data, regime) -> Tuple[np.ndarray, np.ndarray]:
+    """(long, short); `regime` e um valor unico ou um por barra."""
+    regime = np.asarray(regime)
+    ret_5 = _col(data, "ret_5", 0)
+    vol_ok = _col(data, "vol_z", 0) >= 1.0
+    return (regime == "BULL") & (ret_5 < 0) & vol_ok, (regime == "BEAR") & (ret_5 > 0) & vol_ok
+
+
+def _combine(data, regime) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    short = short_sniper_mask(data)
+    long_dip = long_dip_mask(data)
+    tp_long, tp_short = trend_pullback_masks(data, regime)
+    strategy_id = np.select([short, long_dip, tp_long | tp_short], [1, 2, 3], 0)
+    rule_long = (strategy_id == 2) | ((strategy_id == 3) & tp_long)
+    rule_short = (strategy_id == 1) | ((strategy_id == 3) & tp_short)
+    return strategy_id, rule_long, rule_short
+
+
+def combine_strategies_frame(df: pd.DataFrame, regime) -> pd.DataFrame:
+    """
+    combine_strategies para todas as barras de uma vez: colunas rule_long,
+    rule_short (0/1), strategy e strategy_id (indice em STRATEGIES).
+    """
+    strategy_id, rule_long, rule_short = _combine(df, regime)
+    strategy_id = np.broadcast_to(strategy_id, (len(df),))
+    return pd.DataFrame(
+        {
+            "rule_long": np.broadcast_to(rule_long, (len(df),)).astype(int),
+            "rule_short": np.broadcast_to(rule_short, (len(df),)).astype(int),
+            "strategy": np.asarray(STRATEGIES, dtype=object)[strategy_id],
+            "strategy_id": strategy_id,
+        },
+        index=df.index,
+    )
 
 
 def rule_short_sniper(row: dict) -> Dict[str, int | str]:
-    conds = [
-        row.get("rsi14", 0) >= 72,
-        row.get("vol_z", 0) >= 1.5,
-        row.get("upper_wick", 0) >= 0.35,
-        row.get("ret_15", 0) >= 0.12,
-    ]
-    return {"rule_short": int(all(conds)), "rule_long": 0, "strategy": "SHORT_SNIPER"}
+    return {"rule_short": int(short_sniper_mask(row)), "rule_long": 0, "strategy": "SHORT_SNIPER"}
 
 
 def rule_long_dip(row: dict) -> Dict[str, int | str]:
-    conds = [
-        row.get("rsi14", 100) <= 28,
-        row.get("ret_15", 0) <= -0.08,
-        row.get("vol_z", 0) >= 1.2,
-        row.get("lower_wick", 0) >= 0.30,
-    ]
-    return {"rule_long": int(all(conds)), "rule_short": 0, "strategy": "LONG_DIP"}
+    return {"rule_long": int(long_dip_mask(row)), "rule_short": 0, "strategy": "LONG_DIP"}
 
 
 def rule_trend_pullback(row: dict, regime: str) -> Dict[str, int | str]:
-    if regime not in ("BULL", "BEAR"):
-        return {"rule_long": 0, "rule_short": 0, "strategy": "TREND_PULLBACK"}
-
-    ret_5 = row.get("ret_5", 0)
-    vol_z = row.get("vol_z", 0)
-    if regime == "BULL":
-        conds = [ret_5 < 0, vol_z >= 1.0]
-        return {"rule_long": int(all(conds)), "rule_short": 0, "strategy": "TREND_PULLBACK"}
-    conds = [ret_5 > 0, vol_z >= 1.0]
-    return {"rule_long": 0, "rule_short": int(all(conds)), "strategy": "TREND_PULLBACK"}
+    tp_long, tp_short = trend_pullback_masks(row, regime)
+    return {"rule_long": int(tp_long), "rule_short": int(tp_short), "strategy": "TREND_PULLBACK"}
 
 
 def combine_strategies(row: dict, regime: str) -> Dict[str, int | str]:
-    candidates = [
-        rule_short_sniper(row),
-        rule_long_dip(row),
-        rule_trend_pullback(row, regime),
-    ]
-
-    best = {"rule_long": 0, "rule_short": 0, "strategy": "NONE"}
-    for item in candidates:
-        if item["rule_long"] == 1 or item["rule_short"] == 1:
-            best = item
-            break
-    return best
+    strategy_id, rule_long, rule_short = _combine(row, regime)
+    return {"rule_long": int(rule_long), "rule_short": int(rule_short), "strategy": STRATEGIES[int(strategy_id)]}
@@ -0,0 +1,98 @@
+"""
+Escolha do threshold de short (prob de queda >= thr) numa varredura unica:
+as probabilidades sao ordenadas uma vez (O(n log n)) e somas acumuladas dao
+TP, suporte e retorno em todos os pontos de corte distintos.
+
+Objetivos (THRESHOLD_OBJECTIVE):
+  f1          F1 da classe de queda (criterio original)
+  precision   precisao, com suporte minimo
+  net_return  retorno liquido medio por trade short (-fwd_ret_5 - taxa), com
+              suporte minimo
+Suporte minimo = THRESHOLD_MIN_SUPPORT (fracao das linhas de validacao).
+"""
+import math
+from typing import Dict
+
+import numpy as np
+
+OBJECTIVES = ("f1", "precision", "net_return")
+# faixa aceita para o threshold (a da grade antiga, 0.35..0.79); se nenhum
+# ponto de corte cair nela, vale qualquer um
+THR_MIN, THR_MAX = 0.35, 0.80
+# pontos da curva guardados no meta do payload
+CURVE_POINTS = 101
+
+
+def threshold_curve(y_true, proba, fwd_ret=None, fee: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Metricas por ponto de corte distinto, threshold crescente. fwd_ret
+    (retorno futuro por linha, NaN conta como 0) habilita net_return.
+    """
+    p = np.asarray(proba, dtype=np.float64)
+    y = np.asarray(y_true, dtype=np.float64)
+    order = np.argsort(-p, kind="stable")
+    ps = p[order]
+    # ultima posicao de cada valor: prever queda em tudo ate ela (p >= valor)
+    last = np.r_[np.flatnonzero(ps[1:] != ps[:-1]), len(ps) - 1][::-1] if len(ps) else np.empty(0, dtype=np.int64)
+    support = last + 1
+    tp = np.cumsum(y[order])[last]
+    pos = float(y.sum())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = {
+            "threshold": ps[last],
+            "support": support,
+            "precision": tp / support,
+            "recall": tp / pos if pos else np.zeros(len(last)),
+            # 2TP / (2TP + FP + FN), com TP + FP = suporte e TP + FN = positivos
+            "f1": 2 * tp / (support + pos),
+        }
+    if fwd_ret is not None:
+        net = -np.nan_to_num(np.asarray(fwd_ret, dtype=np.float64)[order]) - fee
+        out["net_return"] = np.cumsum(net)[last] / support
+    return out
+
+
+def best_threshold(
+    y_true,
+    proba,
+    objective: str = "f1",
+    fwd_ret=None,
+    fee: float = 0.0,
+    min_support: float = 0.05,
+) -> Dict:
+    """
+    Melhor ponto de corte para `objective` (empate: o menor threshold).
+    Retorna threshold, score e as metricas nele, mais a curva amostrada
+    (ate CURVE_POINTS pontos) em listas.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objetivo desconhecido: {objective}")
+    if objective == "net_return" and fwd_ret is None:
+        raise ValueError("net_return precisa de fwd_ret")
+    curve = threshold_curve(y_true, proba, fwd_ret, fee)
+    thr = curve["threshold"]
+    if not len(thr):
+        return {"objective": objective, "threshold": 0.5, "score": None, "f1": 0.0, "curve": {}}
+    in_range = (thr >= THR_MIN) & (thr < THR_MAX)
+    enough = np.ones(len(thr), dtype=bool)
+    if objective != "f1":
+        enough = curve["support"] >= max(1, math.ceil(min_support * len(np.asarray(proba))))
+    for mask in (in_range & enough, enough, np.ones(len(thr), dtype=bool)):
+        if mask.any():
+            break
+    score = np.where(mask, np.nan_to_num(curve[objective], nan=-np.inf), -np.inf)
+    i = int(np.argmax(score))
+    keep = np.union1d(np.linspace(0, len(thr) - 1, min(CURVE_POINTS, len(thr))).round().astype(int), [i])
+    out = {
+        "objective": objective,
+        "threshold": float(thr[i]),
+        "score": float(curve[objective][i]),
+        "f1": float(curve["f1"][i]),
+        "precision": float(curve["precision"][i]),
+        "recall": float(curve["recall"][i]),
+        "support": int(curve["support"][i]),
+        "curve": {k: np.round(v[keep], 6).tolist() for k, v in curve.items()},
+    }
+    if "net_return" in curve:
+        out["net_return"] = float(curve["net_return"][i])
+    return out
@@ -26,3 +26,70 @@ HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.6"))
 
 # Regime snapshot cache (para nao bater fontes externas a cada request)
 REGIME_SNAPSHOT_TTL_SEC = int(os.getenv("REGIME_SNAPSHOT_TTL_SEC", "120"))
+
+# Pool HTTP compartilhado do coletor: requisicoes simultaneas por exchange
+BINGX_MAX_CONCURRENCY = int(os.getenv("BINGX_MAX_CONCURRENCY", "10"))
+BINANCE_MAX_CONCURRENCY = int(os.getenv("BINANCE_MAX_CONCURRENCY", "10"))
+HTTP_TIMEOUT_SEC = float(os.getenv("HTTP_TIMEOUT_SEC", "20"))
+
+# Armazenamento local de candles (colunas binarias por simbolo/intervalo/dia)
+CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR", "data/raw/candles")
+CANDLE_STORE_ENABLED = os.getenv("CANDLE_STORE_ENABLED", "1").lower() in ("1", "true", "yes")
+
+# Orcamento de peso por minuto em cada exchange (limites publicos de market data)
+BINGX_WEIGHT_PER_MIN = int(os.getenv("BINGX_WEIGHT_PER_MIN", "1200"))
+BINANCE_WEIGHT_PER_MIN = int(os.getenv("BINANCE_WEIGHT_PER_MIN", "6000"))
+
+# Orcamento de memoria do cache de candles do coletor (LRU por simbolo/intervalo)
+CANDLES_CACHE_MAX_MB = int(os.getenv("CANDLES_CACHE_MAX_MB", "256"))
+
+# Circuit breaker por exchange: falhas seguidas ate abrir e tempo de espera
+CIRCUIT_FAIL_THRESHOLD = int(os.getenv("CIRCUIT_FAIL_THRESHOLD", "5"))
+CIRCUIT_COOLOFF_SEC = float(os.getenv("CIRCUIT_COOLOFF_SEC", "30"))
+
+# Hedge BingX -> Binance: se a BingX nao responder em ~p95 da sua latencia
+# (HEDGE_DELAY_SEC ate haver amostras), dispara a Binance e fica com a primeira
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "0").lower() in ("1", "true", "yes")
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+HEDGE_DELAY_SEC = float(os.getenv("HEDGE_DELAY_SEC", "1.0"))
+
+# Candles 1m do WebSocket mantidos em memoria por simbolo
+STREAM_BUFFER_BARS = int(os.getenv("STREAM_BUFFER_BARS", "6000"))
+# streams por conexao WebSocket e teto do backoff de reconexao
+STREAM_SHARD_SIZE = int(os.getenv("STREAM_SHARD_SIZE", "25"))
+STREAM_RECONNECT_MAX_SEC = float(os.getenv("STREAM_RECONNECT_MAX_SEC", "60"))
+
+# Modo intrabar: mantem o candle 1m em formacao no buffer (provisorio) e
+# reavalia as regras sobre ele no maximo a cada INTRABAR_EVAL_SEC por simbolo
+STREAM_INTRABAR = os.getenv("STREAM_INTRABAR", "0").lower() in ("1", "true", "yes")
+INTRABAR_EVAL_SEC = float(os.getenv("INTRABAR_EVAL_SEC", "1.0"))
+
+# Snapshot dos buffers do stream (e modelos online) para warm start apos restart
+STREAM_SNAPSHOT_DIR = os.getenv("STREAM_SNAPSHOT_DIR", "data/processed/snapshot")
+STREAM_SNAPSHOT_SEC = int(os.getenv("STREAM_SNAPSHOT_SEC", "300"))
+SNAPSHOT_MODELS = os.getenv("SNAPSHOT_MODELS", "1").lower() in ("1", "true", "yes")
+
+# Intervalos agregados incrementalmente a partir dos 1m do stream
+STREAM_AGG_INTERVALS = [
+    iv.strip() for iv in os.getenv("STREAM_AGG_INTERVALS", "5m,15m").split(",") if iv.strip()
+]
+
+# Caminho de services.features.add_indicators: "ta" (original) ou "numpy" (feature_kernels)
+FEATURES_ENGINE = os.getenv("FEATURES_ENGINE", "ta").strip().lower()
+# Simbolos por painel de indicadores no scan (FEATURES_ENGINE=numpy)
+FEATURES_PANEL_CHUNK = int(os.getenv("FEATURES_PANEL_CHUNK", "64"))
+# "full" (DataFrames float64) ou "compact" (FeatureMatrix float32, sem colunas intermediarias)
+FEATURES_MEMORY_PROFILE = os.getenv("FEATURES_MEMORY_PROFILE", "full").strip().lower()
+# Inferencia do modelo: numpy (arrays exportados do payload) ou sklearn
+MODEL_INFERENCE = os.getenv("MODEL_INFERENCE", "numpy").strip().lower()
+# Processos da validacao cruzada do treino (0 = numero de CPUs)
+TRAIN_CV_WORKERS = int(os.getenv("TRAIN_CV_WORKERS", "0"))
+# Objetivo do threshold no treino: f1, precision ou net_return (retorno liquido por trade)
+THRESHOLD_OBJECTIVE = os.getenv("THRESHOLD_OBJECTIVE", "f1").strip().lower()
+# Suporte minimo (fracao do holdout) para os objetivos precision e net_return
+THRESHOLD_MIN_SUPPORT = float(os.getenv("THRESHOLD_MIN_SUPPORT", "0.05"))
+
+# Registro versionado de modelos (artefatos imutaveis + ponteiro CURRENT)
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "data/models/registry")
+# Intervalo (s) da checagem de troca de versao por outro processo (0 desliga)
+MODEL_WATCH_SEC = float(os.getenv("MODEL_WATCH_SEC", "2"))
@@ -0,0 +1,112 @@
+"""
+Warm start: os buffers 1m do stream (e, opcionalmente, os OnlineModel) sao
+gravados em STREAM_SNAPSHOT_DIR no shutdown e a cada STREAM_SNAPSHOT_SEC.
+No startup o snapshot e recarregado e a cauda que faltou vem do REST.
+
+Arquivos: stream_buffers.npz (<SIMBOLO>__t int64, <SIMBOLO>__cols float64 (5, n))
+e online_models.joblib.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict
+
+import joblib
+import numpy as np
+
+from . import market_stream, online_model
+from .utils import SNAPSHOT_MODELS, STREAM_BUFFER_BARS, STREAM_SNAPSHOT_DIR, STREAM_SNAPSHOT_SEC
+
+logger = logging.getLogger(__name__)
+
+_BUFFERS_FILE = "stream_buffers.npz"
+_MODELS_FILE = "online_models.joblib"
+_SAVE_LOCK = threading.Lock()
+_STARTED = False
+
+
+def _path(name: str) -> str:
+    return os.path.join(STREAM_SNAPSHOT_DIR, name)
+
+
+def _atomic_write(name: str, write) -> None:
+    os.makedirs(STREAM_SNAPSHOT_DIR, exist_ok=True)
+    tmp = _path(name) + ".tmp"
+    with open(tmp, "wb") as fh:
+        write(fh)
+    os.replace(tmp, _path(name))
+
+
+def save() -> Dict[str, int]:
+    """Grava o snapshot atual; retorna quantos simbolos/modelos foram salvos."""
+    with _SAVE_LOCK:
+        buffers = market_stream.export_buffers()
+        arrays = {}
+        for symbol, (open_ms, cols) in buffers.items():
+            arrays[f"{symbol}__t"] = open_ms
+            arrays[f"{symbol}__cols"] = cols
+        if arrays:
+            _atomic_write(_BUFFERS_FILE, lambda fh: np.savez(fh, **arrays))
+        models = online_model.export_models() if SNAPSHOT_MODELS else {}
+        if models:
+            _atomic_write(_MODELS_FILE, lambda fh: joblib.dump(models, fh))
+        return {"symbols": len(buffers), "models": len(models)}
+
+
+def _load_buffers() -> Dict[str, tuple]:
+    try:
+        npz = np.load(_path(_BUFFERS_FILE))
+    except (FileNotFoundError, OSError, ValueError):
+        return {}
+    # snapshot mais velho que o buffer inteiro deixaria um buraco: o coletor cuida desses
+    oldest_ok = int(time.time() * 1000) - STREAM_BUFFER_BARS * 60_000
+    data = {}
+    with npz:
+        for key in npz.files:
+            if not key.endswith("__t"):
+                continue
+            symbol = key[:-3]
+            open_ms = npz[key]
+            if len(open_ms) and int(open_ms[-1]) >= oldest_ok:
+                data[symbol] = (open_ms, npz[f"{symbol}__cols"])
+    return data
+
+
+def restore() -> Dict[str, int]:
+    """Recarrega o snapshot (antes de start_stream) e dispara o top-up via REST."""
+    try:
+        buffers = _load_buffers()
+        bars = market_stream.import_buffers(buffers)
+    except Exception:
+        logger.exception("warmstart: falha ao carregar buffers")
+        buffers, bars = {}, 0
+    models = 0
+    if SNAPSHOT_MODELS:
+        try:
+            models = online_model.import_models(joblib.load(_path(_MODELS_FILE)))
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.exception("warmstart: falha ao carregar modelos online")
+    if buffers:
+        market_stream.top_up(list(buffers))
+    logger.info("warmstart: %d simbolos (%d barras), %d modelos", len(buffers), bars, models)
+    return {"symbols": len(buffers), "bars": bars, "models": models}
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(STREAM_SNAPSHOT_SEC)
+        try:
+            save()
+        except Exception:
+            logger.exception("warmstart: falha ao gravar snapshot")
+
+
+def start() -> None:
+    global _STARTED
+    if _STARTED or STREAM_SNAPSHOT_SEC <= 0:
+        return
+    threading.Thread(target=_flush_loop, name="warmstart-flush", daemon=True).start()
+    _STARTED = True